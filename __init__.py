@@ -1,2 +1,5 @@
 # -*- coding: utf-8 -*-
+from . import controllers
 from . import models
+from . import report
+from . import wizard
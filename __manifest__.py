@@ -18,6 +18,7 @@ ESKON Workorder Management
 - Опрема и материјали
 - Статуси на работни налози
 - Градежен дневник
+- Евиденција на часови од одобрени дневници
 - Извештаи и следење
 
 Автор: ЕСКОН-ИНЖЕНЕРИНГ ДООЕЛ Струмица
@@ -28,6 +29,7 @@ ESKON Workorder Management
     'depends': [
         'project',
         'hr',
+        'hr_timesheet',
         'fleet',
         'stock',
         'mail',
@@ -35,13 +37,23 @@ ESKON Workorder Management
     'data': [
         'security/ir.model.access.csv',
         'data/paper_format.xml',
+        'data/ir_cron.xml',
         'report/construction_book_report.xml',
         'report/construction_book_entry_report.xml',
         'report/construction_diary_report.xml',
+        'report/construction_book_quantity_report_views.xml',
+        'report/fleet_vehicle_utilization_report_views.xml',
+        'wizard/construction_book_period_close_views.xml',
+        'wizard/construction_book_entry_line_import_views.xml',
+        'wizard/construction_diary_timesheet_generate_views.xml',
         'views/construction_diary_views.xml',
         'views/construction_book_views.xml',
         'views/construction_book_entry_views.xml',
         'views/project_task_views.xml',
+        'views/workorder_equipment_custody_views.xml',
+        'views/workorder_kpi_views.xml',
+        'views/workorder_conflict_views.xml',
+        'views/workorder_profile_views.xml',
         'views/menu_views.xml',
     ],
     'installable': True,
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+
+
+class WorkorderSyncController(http.Controller):
+
+    @http.route('/eskon_workorder/sync', type='json', auth='user', methods=['POST'])
+    def sync(self, diaries=None, equipment_lines=None, cursor=None, **kwargs):
+        """Offline sync of field devices in one round-trip.
+
+        Applies the batched ``diaries`` and ``equipment_lines`` of the device
+        and returns a page of the records changed on the server after
+        ``cursor``; the device repeats the call while ``more`` is set.
+        """
+        return request.env['workorder.sync']._sync(
+            diaries=diaries or [],
+            equipment_lines=equipment_lines or [],
+            cursor=cursor,
+        )
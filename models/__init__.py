@@ -1,7 +1,18 @@
 # -*- coding: utf-8 -*-
+from . import account_analytic_line
+from . import ir_actions_report
+from . import ir_sequence
+from . import workorder_fulltext
+from . import workorder_geo
 from . import project_task
 from . import workorder_equipment
+from . import workorder_equipment_custody
 from . import construction_diary
 from . import construction_diary_line
+from . import construction_diary_photo
 from . import construction_book
 from . import construction_book_entry
+from . import workorder_kpi
+from . import workorder_conflict
+from . import workorder_sync
+from . import workorder_profile
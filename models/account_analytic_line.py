@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models
+
+
+class AccountAnalyticLine(models.Model):
+    _inherit = 'account.analytic.line'
+
+    diary_id = fields.Many2one(
+        'construction.diary',
+        string='Градежен дневник',
+        index='btree_not_null',
+        ondelete='set null',
+        readonly=True,
+        help='Одобрен дневнички запис од кој е генерирана евиденцијата'
+    )
+
+    _sql_constraints = [
+        ('diary_employee_uniq', 'unique(diary_id, employee_id)',
+         'Работникот веќе има евиденција на часови за овој дневнички запис!'),
+    ]
@@ -1,13 +1,46 @@
 # -*- coding: utf-8 -*-
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import date
+
+import xlsxwriter
+
 from odoo import api, fields, models, _
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL, split_every
+from odoo.tools.pdf import PdfFileReader, PdfFileWriter
+
+# Book fields listed on the header sheet of the XLSX export
+XLSX_HEADER_FIELDS = (
+    'name', 'construction_name', 'construction_address', 'investor_name',
+    'contractor_company', 'supervision_company', 'supervision_engineer_name',
+    'construction_start_date', 'construction_end_date',
+)
+
+
+def _merge_pdf_files(paths, output_path):
+    """Concatenate the PDF files at ``paths`` into ``output_path``"""
+    writer = PdfFileWriter()
+    streams = [open(path, 'rb') for path in paths]
+    try:
+        for stream in streams:
+            reader = PdfFileReader(stream, strict=False)
+            for page in range(reader.getNumPages()):
+                writer.addPage(reader.getPage(page))
+        with open(output_path, 'wb') as output:
+            writer.write(output)
+    finally:
+        for stream in streams:
+            stream.close()
 
 
 class ConstructionBook(models.Model):
     _name = 'construction.book'
     _description = 'Construction Book (Градежна Книга)'
     _order = 'name desc'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'workorder.geo.mixin']
 
     name = fields.Char(
         string='Книга бр.',
@@ -201,19 +234,35 @@ class ConstructionBook(models.Model):
 
     @api.depends('diary_ids')
     def _compute_diary_count(self):
+        # Saved books are counted in one grouped query; books being edited
+        # in a form count their cached lines.
+        counts = {
+            book.id: count
+            for book, count in self.env['construction.diary']._read_group(
+                [('book_id', 'in', self.filtered('id').ids)], ['book_id'], ['__count'])
+        }
         for book in self:
-            book.diary_count = len(book.diary_ids)
+            book.diary_count = counts.get(book.id, 0) if book.id else len(book.diary_ids)
 
     @api.depends('entry_ids')
     def _compute_entry_count(self):
+        counts = {
+            book.id: count
+            for book, count in self.env['construction.book.entry']._read_group(
+                [('book_id', 'in', self.filtered('id').ids)], ['book_id'], ['__count'])
+        }
         for book in self:
-            book.entry_count = len(book.entry_ids)
-
-    @api.model
-    def create(self, vals):
-        if vals.get('name', _('New')) == _('New'):
-            vals['name'] = self.env['ir.sequence'].next_by_code('construction.book') or _('New')
-        return super().create(vals)
+            book.entry_count = counts.get(book.id, 0) if book.id else len(book.entry_ids)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        new_name = _('New')
+        pending = [vals for vals in vals_list if vals.get('name', new_name) == new_name]
+        if pending:
+            names = self.env['ir.sequence'].next_by_code_batch('construction.book', len(pending))
+            for vals, name in zip(pending, names):
+                vals['name'] = name or new_name
+        return super().create(vals_list)
 
     def action_activate(self):
         """Activate the construction book"""
@@ -247,6 +296,17 @@ class ConstructionBook(models.Model):
             'context': {'default_book_id': self.id},
         }
 
+    def action_view_quantities(self):
+        """View the bill of quantities of this book"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Количини'),
+            'res_model': 'construction.book.quantity.report',
+            'view_mode': 'pivot,graph,list',
+            'domain': [('book_id', '=', self.id)],
+        }
+
     def action_view_entries(self):
         """View all book entries/pages"""
         self.ensure_one()
@@ -265,6 +325,239 @@ class ConstructionBook(models.Model):
             },
         }
 
+    def action_export_full_pdf(self):
+        """Export the whole book (header, pages and diaries) as one PDF"""
+        self.ensure_one()
+        return self._action_download(self._export_full_pdf())
+
+    def _export_full_pdf(self):
+        """Render the book in bounded chunks and merge them on disk.
+
+        Every chunk of entries or diaries is a separate report render whose
+        PDF is written to a temporary file, and the ORM cache is cleared
+        between chunks, so rendering memory depends on the chunk size. The
+        merge step still holds the page objects of the whole book while the
+        merged file is written; the result is then streamed into the
+        attachment instead of being read back.
+        """
+        self.ensure_one()
+        chunk_size = int(self.env['ir.config_parameter'].sudo().get_param(
+            'eskon_workorder.book_pdf_chunk_size', 50))
+        entry_ids = self.env['construction.book.entry'].search(
+            [('book_id', '=', self.id)], order='page_number, id').ids
+        diary_ids = self.env['construction.diary'].search(
+            [('book_id', '=', self.id)], order='date, id').ids
+
+        parts = [('eskon_workorder.report_construction_book', self.ids)]
+        parts += [
+            ('eskon_workorder.report_construction_book_entry', chunk)
+            for chunk in split_every(chunk_size, entry_ids, list)
+        ]
+        parts += [
+            ('eskon_workorder.report_construction_diary', chunk)
+            for chunk in split_every(chunk_size, diary_ids, list)
+        ]
+
+        report_model = self.env['ir.actions.report']
+        with tempfile.TemporaryDirectory(prefix='construction_book_') as tmpdir:
+            paths = []
+            for index, (report_ref, res_ids) in enumerate(parts):
+                pdf_content, _report_type = report_model._render_qweb_pdf(report_ref, res_ids)
+                path = os.path.join(tmpdir, '%05d.pdf' % index)
+                with open(path, 'wb') as chunk_file:
+                    chunk_file.write(pdf_content)
+                paths.append(path)
+                del pdf_content
+                self.env.invalidate_all()
+
+            merged_path = os.path.join(tmpdir, 'book.pdf')
+            _merge_pdf_files(paths, merged_path)
+            return self._create_attachment_from_file(
+                merged_path, '%s.pdf' % self.name.replace('/', '-'), 'application/pdf')
+
+    def _create_attachment_from_file(self, path, name, mimetype):
+        """Attach the file at ``path`` to this book without loading it whole.
+
+        With the default file storage the checksum is computed block by
+        block and the file is copied into the filestore as is. Database
+        storage needs the content in memory and falls back to reading it.
+        """
+        self.ensure_one()
+        Attachment = self.env['ir.attachment']
+        vals = {
+            'name': name,
+            'type': 'binary',
+            'mimetype': mimetype,
+            'res_model': self._name,
+            'res_id': self.id,
+        }
+        if Attachment._storage() != 'file':
+            with open(path, 'rb') as source:
+                return Attachment.create(dict(vals, raw=source.read()))
+
+        sha = hashlib.sha1()
+        with open(path, 'rb') as source:
+            for block in iter(lambda: source.read(1 << 20), b''):
+                sha.update(block)
+        checksum = sha.hexdigest()
+        fname, full_path = Attachment._get_path(b'', checksum)
+        if not os.path.exists(full_path):
+            shutil.copyfile(path, full_path)
+        Attachment._mark_for_gc(fname)
+
+        # create() drops the storage columns, so they are set afterwards
+        attachment = Attachment.create(vals)
+        self.env.cr.execute(SQL(
+            "UPDATE ir_attachment SET store_fname = %s, file_size = %s, checksum = %s WHERE id = %s",
+            fname, os.path.getsize(path), checksum, attachment.id,
+        ))
+        attachment.invalidate_recordset(['store_fname', 'file_size', 'checksum'])
+        return attachment
+
+    def action_export_xlsx(self):
+        """Export the whole book as a spreadsheet with all lines on one sheet"""
+        self.ensure_one()
+        return self._action_download(self._export_xlsx(per_entry=False))
+
+    def action_export_xlsx_per_entry(self):
+        """Export the whole book as a spreadsheet with one sheet per page"""
+        self.ensure_one()
+        return self._action_download(self._export_xlsx(per_entry=True))
+
+    def _action_download(self, attachment):
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/{attachment.id}?download=true',
+            'target': 'self',
+        }
+
+    def _export_xlsx(self, per_entry=False):
+        """Write the book header, pages and lines to an XLSX attachment.
+
+        Lines are read straight from SQL in keyset-paginated chunks and
+        written through xlsxwriter's constant-memory mode, which flushes
+        every finished row to disk; the finished workbook is streamed into
+        the attachment. Constant-memory mode keeps one open temporary file
+        per sheet, so the per-page export is capped at
+        ``eskon_workorder.book_xlsx_max_sheets`` pages.
+        """
+        self.ensure_one()
+        ICP = self.env['ir.config_parameter'].sudo()
+        chunk_size = int(ICP.get_param('eskon_workorder.book_xlsx_chunk_size', 5000))
+        if per_entry:
+            max_sheets = int(ICP.get_param('eskon_workorder.book_xlsx_max_sheets', 500))
+            page_count = self.env['construction.book.entry'].search_count([('book_id', '=', self.id)])
+            if page_count > max_sheets:
+                raise UserError(_(
+                    'Книгата има %(count)s страници, а извозот по страници дозволува најмногу %(max)s. '
+                    'Користете го извозот на сите позиции во еден лист.',
+                    count=page_count, max=max_sheets,
+                ))
+        columns = [
+            _('№ п/п'), _('Локација'), _('Изведена позиција'), _('Шифра'),
+            _('Производ'), _('Единица мерка'), _('Количина'), _('Забелешки'),
+        ]
+        if not per_entry:
+            columns = [_('Страна бр.'), _('Период од'), _('Период до')] + columns
+
+        with tempfile.TemporaryDirectory(prefix='construction_book_') as tmpdir:
+            path = os.path.join(tmpdir, 'book.xlsx')
+            workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'tmpdir': tmpdir})
+            bold = workbook.add_format({'bold': True})
+            date_format = workbook.add_format({'num_format': 'dd.mm.yyyy'})
+
+            def write_value(sheet, row, col, value):
+                if isinstance(value, date):
+                    sheet.write_datetime(row, col, value, date_format)
+                elif value is not None and value is not False:
+                    sheet.write(row, col, value)
+
+            sheet = workbook.add_worksheet(_('Книга'))
+            for row, fname in enumerate(XLSX_HEADER_FIELDS):
+                sheet.write(row, 0, self._fields[fname].string, bold)
+                write_value(sheet, row, 1, self[fname])
+
+            sheet = None
+            entry_id = row = None
+            sheet_names = set()
+            for lines in self._iter_xlsx_lines(chunk_size):
+                for line in lines:
+                    if sheet is None or (per_entry and line['entry_id'] != entry_id):
+                        entry_id = line['entry_id']
+                        if per_entry:
+                            name = _('Страна %s', line['page_number'])[:31]
+                            if name in sheet_names:
+                                name = ('%s (%s)' % (name, entry_id))[:31]
+                        else:
+                            name = _('Позиции')
+                        sheet_names.add(name)
+                        sheet = workbook.add_worksheet(name)
+                        row = 0
+                        if per_entry:
+                            sheet.write(0, 0, _('Период'), bold)
+                            write_value(sheet, 0, 1, line['period_start'])
+                            write_value(sheet, 0, 2, line['period_end'])
+                            row = 2
+                        for col, label in enumerate(columns):
+                            sheet.write(row, col, label, bold)
+                        row += 1
+
+                    values = [
+                        line['sequence'], line['location'], line['description'], line['default_code'],
+                        line['product_name'], line['uom'], line['quantity'], line['notes'],
+                    ]
+                    if not per_entry:
+                        values = [line['page_number'], line['period_start'], line['period_end']] + values
+                    for col, value in enumerate(values):
+                        write_value(sheet, row, col, value)
+                    row += 1
+            workbook.close()
+
+            return self._create_attachment_from_file(
+                path, '%s.xlsx' % self.name.replace('/', '-'),
+                'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+    def _iter_xlsx_lines(self, chunk_size):
+        """Yield the book lines in page order, ``chunk_size`` rows at a time.
+
+        Each chunk is a separate query resuming after the last row of the
+        previous one, so only one chunk of rows is held at any time.
+        """
+        self.env['construction.book.entry'].flush_model()
+        self.env['construction.book.entry.line'].flush_model()
+        lang = self.env.lang or 'en_US'
+        last = None
+        while True:
+            after = SQL('TRUE') if last is None else SQL(
+                "(e.page_number, e.id, COALESCE(l.sequence, 0), l.id) > (%s, %s, %s, %s)", *last)
+            self.env.cr.execute(SQL(
+                """
+                SELECT e.id AS entry_id, e.page_number, e.period_start, e.period_end,
+                       l.id, l.sequence, l.location, l.description, l.uom, l.quantity, l.notes,
+                       pp.default_code,
+                       COALESCE(pt.name->>%(lang)s, pt.name->>'en_US') AS product_name
+                  FROM construction_book_entry e
+                  JOIN construction_book_entry_line l ON l.entry_id = e.id
+             LEFT JOIN product_product pp ON pp.id = l.product_id
+             LEFT JOIN product_template pt ON pt.id = pp.product_tmpl_id
+                 WHERE e.book_id = %(book_id)s AND %(after)s
+              ORDER BY e.page_number, e.id, COALESCE(l.sequence, 0), l.id
+                 LIMIT %(limit)s
+                """,
+                lang=lang,
+                book_id=self.id,
+                after=after,
+                limit=chunk_size,
+            ))
+            lines = self.env.cr.dictfetchall()
+            if not lines:
+                return
+            yield lines
+            if len(lines) < chunk_size:
+                return
+            tail = lines[-1]
+            last = (tail['page_number'], tail['entry_id'], tail['sequence'] or 0, tail['id'])
+
     @api.constrains('construction_start_date', 'construction_end_date')
     def _check_dates(self):
         for book in self:
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError
 
+from .workorder_profile import profiled
+
 
 class ConstructionBookEntry(models.Model):
     _name = 'construction.book.entry'
@@ -27,6 +29,7 @@ class ConstructionBookEntry(models.Model):
     page_number = fields.Integer(
         string='Страна на книга',
         required=True,
+        index=True,
         default=1,
         help='Реден број на страница во градежната книга'
     )
@@ -157,6 +160,11 @@ class ConstructionBookEntry(models.Model):
         help='Дополнителни забелешки'
     )
 
+    def init(self):
+        # Covers book_id lookups and the page ordering within a book.
+        tools.create_index(self._cr, 'construction_book_entry_book_id_page_number_index',
+                           self._table, ['book_id', 'page_number'])
+
     @api.depends('period_start', 'period_end')
     def _compute_period_display(self):
         for entry in self:
@@ -174,18 +182,24 @@ class ConstructionBookEntry(models.Model):
             entry.line_count = len(entry.line_ids)
             entry.total_quantity = sum(entry.line_ids.mapped('quantity'))
 
-    @api.model
-    def create(self, vals):
-        if vals.get('name', _('New')) == _('New'):
-            vals['name'] = self.env['ir.sequence'].next_by_code('construction.book.entry') or _('New')
-        return super().create(vals)
-
+    @api.model_create_multi
+    def create(self, vals_list):
+        new_name = _('New')
+        pending = [vals for vals in vals_list if vals.get('name', new_name) == new_name]
+        if pending:
+            names = self.env['ir.sequence'].next_by_code_batch('construction.book.entry', len(pending))
+            for vals, name in zip(pending, names):
+                vals['name'] = name or new_name
+        return super().create(vals_list)
+
+    @profiled('construction.book.entry.action_confirm')
     def action_confirm(self):
         """Confirm the entry"""
         self.ensure_one()
         self.write({'state': 'confirmed'})
         return True
 
+    @profiled('construction.book.entry.action_sign')
     def action_sign(self):
         """Mark entry as signed"""
         self.ensure_one()
@@ -197,6 +211,7 @@ class ConstructionBookEntry(models.Model):
     def action_reset_draft(self):
         """Reset to draft"""
         self.ensure_one()
+        self.env['ir.actions.report']._unlink_cached_pdfs(self)
         self.write({'state': 'draft'})
         return True
 
@@ -223,6 +238,7 @@ class ConstructionBookEntryLine(models.Model):
         'construction.book.entry',
         string='Страница',
         required=True,
+        index=True,
         ondelete='cascade'
     )
 
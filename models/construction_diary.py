@@ -1,13 +1,42 @@
 # -*- coding: utf-8 -*-
-from odoo import api, fields, models, _
+from markupsafe import Markup
+
+from odoo import Command, api, fields, models, tools, _
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL, is_html_empty, split_every
+
+from .workorder_profile import profiled
+
+# Header and shift fields carried over from the previous diary of a workorder
+DAILY_CARRY_FIELDS = (
+    'book_id', 'book_number', 'construction_name', 'main_contractor', 'subcontractor',
+    'investor_name', 'site_address',
+    'shift1_start', 'shift1_end', 'shift2_start', 'shift2_end', 'shift3_start', 'shift3_end',
+    'shift_start', 'shift_end',
+    'recorded_by_name', 'recorded_by_id', 'construction_manager_name', 'construction_manager_id',
+    'investor_representative', 'supervision_engineer_name', 'supervision_engineer_id',
+)
+
+# Resource line models copied along with the previous diary, and their fields
+DAILY_CARRY_LINES = {
+    'construction.diary.worker.line': ('sequence', 'qualification', 'count'),
+    'construction.diary.vehicle.line': ('sequence', 'vehicle_type', 'vehicle_id', 'count'),
+    'construction.diary.machine.line': ('sequence', 'machine_type', 'count'),
+}
+
+# Timesheet lines created per batch
+TIMESHEET_BATCH_SIZE = 1000
 
 
 class ConstructionDiary(models.Model):
     _name = 'construction.diary'
     _description = 'Construction Diary Entry'
     _order = 'date desc, id desc'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'workorder.fulltext.mixin']
+    _fulltext_fields = (
+        'contractor_notes', 'work_description', 'inspection_notes', 'supervision_notes',
+        'safety_notes', 'incident_description', 'notes',
+    )
 
     name = fields.Char(
         string='Број на запис',
@@ -72,6 +101,7 @@ class ConstructionDiary(models.Model):
     date = fields.Date(
         string='Ден/Датум',
         required=True,
+        index=True,
         default=fields.Date.context_today,
         tracking=True
     )
@@ -303,6 +333,15 @@ class ConstructionDiary(models.Model):
         help='Фотографии од работата'
     )
 
+    photo_image_ids = fields.Many2many(
+        'construction.diary.photo',
+        'construction_diary_photo_image_rel',
+        'diary_id',
+        'photo_id',
+        string='Обработени фотографии',
+        help='Намалени фотографии без дупликати, со мали слики за приказ и извештај'
+    )
+
     # === Status ===
     state = fields.Selection([
         ('draft', 'Нацрт'),
@@ -327,6 +366,33 @@ class ConstructionDiary(models.Model):
         string='Дополнителни забелешки'
     )
 
+    sync_key = fields.Char(
+        string='Клуч за синхронизација',
+        copy=False,
+        readonly=True,
+        help='Клуч генериран од уредот при офлајн внес; спречува двојно креирање'
+    )
+
+    timesheet_ids = fields.One2many(
+        'account.analytic.line',
+        'diary_id',
+        string='Евиденција на часови',
+        readonly=True
+    )
+
+    _sql_constraints = [
+        ('sync_key_uniq', 'unique(sync_key)', 'Записот е веќе синхронизиран!'),
+    ]
+
+    def init(self):
+        super().init()
+        # task_id and book_id lookups are served by the composite indexes,
+        # which also cover the date ordering of the list and calendar views.
+        tools.create_index(self._cr, 'construction_diary_task_id_date_index',
+                           self._table, ['task_id', 'date'])
+        tools.create_index(self._cr, 'construction_diary_book_id_date_index',
+                           self._table, ['book_id', 'date'])
+
     # === Computed Methods ===
     @api.depends('shift1_start', 'shift1_end', 'shift2_start', 'shift2_end', 'shift3_start', 'shift3_end')
     def _compute_shift_hours(self):
@@ -367,20 +433,68 @@ class ConstructionDiary(models.Model):
         for record in self:
             record.total_workers_from_lines = sum(record.worker_line_ids.mapped('count'))
 
-    @api.model
-    def create(self, vals):
-        if vals.get('name', _('New')) == _('New'):
-            vals['name'] = self.env['ir.sequence'].next_by_code('construction.diary') or _('New')
-        return super().create(vals)
-
+    @api.model_create_multi
+    def create(self, vals_list):
+        new_name = _('New')
+        pending = [vals for vals in vals_list if vals.get('name', new_name) == new_name]
+        if pending:
+            names = self.env['ir.sequence'].next_by_code_batch('construction.diary', len(pending))
+            for vals, name in zip(pending, names):
+                vals['name'] = name or new_name
+        diaries = super().create(vals_list)
+        diaries.filtered('photo_ids')._ingest_photos()
+        self.env['workorder.kpi']._refresh(diaries.task_id.ids)
+        return diaries
+
+    def write(self, vals):
+        old_tasks = self.task_id
+        res = super().write(vals)
+        if 'photo_ids' in vals and not self.env.context.get('diary_photo_ingest'):
+            self._ingest_photos()
+        if 'task_id' in vals or 'date' in vals:
+            self.env['workorder.kpi']._refresh((old_tasks | self.task_id).ids)
+        return res
+
+    def unlink(self):
+        tasks = self.task_id
+        res = super().unlink()
+        self.env['workorder.kpi']._refresh(tasks.ids)
+        return res
+
+    def _ingest_photos(self):
+        """Replace uploaded images in ``photo_ids`` by processed diary photos.
+
+        Originals are downscaled, matched by content checksum against the
+        photos of all diaries and dropped once no diary refers to them.
+        Images that cannot be decoded are kept as uploaded.
+        """
+        uploads = self.photo_ids.filtered(lambda a: (a.mimetype or '').startswith('image/'))
+        if not uploads:
+            return
+        photos = self.env['construction.diary.photo']._get_or_create_from_attachments(uploads)
+        uploads = uploads.filtered(lambda attachment: attachment.checksum in photos)
+        for diary in self.with_context(diary_photo_ingest=True):
+            diary_uploads = diary.photo_ids & uploads
+            if diary_uploads:
+                diary.write({
+                    'photo_ids': [Command.unlink(attachment.id) for attachment in diary_uploads],
+                    'photo_image_ids': [Command.link(photos[attachment.checksum].id) for attachment in diary_uploads],
+                })
+        # Looked up as superuser: diaries hidden from the current user may
+        # still refer to the originals.
+        still_used = self.sudo().search([('photo_ids', 'in', uploads.ids)]).photo_ids
+        (uploads.sudo() - still_used).unlink()
+
+    @profiled('construction.diary.action_confirm')
     def action_confirm(self):
         """Confirm the diary entry"""
         self.ensure_one()
-        if not self.contractor_notes and not self.work_description:
+        if is_html_empty(self.contractor_notes) and is_html_empty(self.work_description):
             raise ValidationError(_('Мора да внесете запис на изведувачот!'))
         self.write({'state': 'confirmed'})
         return True
 
+    @profiled('construction.diary.action_approve')
     def action_approve(self):
         """Approve the diary entry"""
         self.ensure_one()
@@ -393,6 +507,12 @@ class ConstructionDiary(models.Model):
     def action_reset_to_draft(self):
         """Reset to draft"""
         self.ensure_one()
+        self.env['ir.actions.report']._unlink_cached_pdfs(self)
+        # Hours may still change; once the diary is approved again, the
+        # timesheet job or wizard generates them anew. The lines belong to
+        # other employees, so diary users without timesheet approver rights
+        # remove them as superuser.
+        self.sudo().timesheet_ids.unlink()
         self.write({'state': 'draft'})
         return True
 
@@ -413,8 +533,169 @@ class ConstructionDiary(models.Model):
     def _onchange_book_id(self):
         """Auto-fill fields from construction book"""
         if self.book_id:
-            self.book_number = self.book_id.name
-            self.construction_name = self.book_id.construction_name
-            self.main_contractor = self.book_id.contractor_company
-            self.investor_name = self.book_id.investor_name
-            self.site_address = self.book_id.construction_address
+            self.update(self._get_book_header_vals(self.book_id))
+
+    @api.model
+    def _get_book_header_vals(self, book):
+        """Return the diary header values taken from construction ``book``"""
+        return {
+            'book_id': book.id,
+            'book_number': book.name,
+            'construction_name': book.construction_name,
+            'main_contractor': book.contractor_company,
+            'investor_name': book.investor_name,
+            'site_address': book.construction_address,
+        }
+
+    @api.model
+    def _cron_prepare_daily_diaries(self, batch_size=500):
+        """Pre-create today's draft diaries of the workorders in progress.
+
+        Workorders that already have a diary for today are skipped, so the
+        job can safely run again. Each run prepares at most ``batch_size``
+        workorders and reports the rest to the scheduler, which commits and
+        runs the job again until all workorders are covered.
+        """
+        today = fields.Date.context_today(self)
+        tasks = self.env['project.task'].search([
+            ('is_workorder', '=', True),
+            ('workorder_state', '=', 'in_progress'),
+        ])
+        todo = tasks - self.search([('task_id', 'in', tasks.ids), ('date', '=', today)]).task_id
+        batch = todo[:batch_size]
+        if batch:
+            self._prepare_daily_diaries(batch, today)
+        self.env['ir.cron']._notify_progress(done=len(batch), remaining=len(todo) - len(batch))
+        return True
+
+    @api.model
+    def _prepare_daily_diaries(self, tasks, date):
+        """Create one draft diary per task for ``date``.
+
+        Header, shift times, present workers and resource lines are copied
+        from the latest earlier diary of each task. Tasks without a diary
+        start from their active construction book and assigned workers.
+        """
+        self.flush_model(['task_id', 'date'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT DISTINCT ON (task_id) task_id, id
+              FROM construction_diary
+             WHERE task_id = ANY(%s) AND date < %s
+          ORDER BY task_id, date DESC, id DESC
+            """,
+            tasks.ids, date,
+        ))
+        previous_by_task = dict(self.env.cr.fetchall())
+        previous = self.browse(previous_by_task.values())
+        previous.fetch(list(DAILY_CARRY_FIELDS) + ['worker_ids'])
+
+        book_by_task = {}
+        books = self.env['construction.book'].search([
+            ('task_ids', 'in', (tasks - previous.task_id).ids),
+            ('state', '=', 'active'),
+        ])
+        for book in books:
+            for task in book.task_ids:
+                book_by_task.setdefault(task.id, book)
+
+        vals_list = []
+        for task in tasks:
+            vals = {
+                'task_id': task.id,
+                'date': date,
+                'contractor_notes': Markup('<p></p>'),
+            }
+            source = self.browse(previous_by_task.get(task.id))
+            if source:
+                for fname in DAILY_CARRY_FIELDS:
+                    vals[fname] = self._fields[fname].convert_to_write(source[fname], source)
+                vals['worker_ids'] = [Command.set(source.worker_ids.ids)]
+            else:
+                if task.id in book_by_task:
+                    vals.update(self._get_book_header_vals(book_by_task[task.id]))
+                vals['worker_ids'] = [Command.set(task.worker_ids.ids)]
+            vals_list.append(vals)
+        diaries = self.create(vals_list)
+
+        new_by_previous = {
+            previous_by_task[diary.task_id.id]: diary.id
+            for diary in diaries if diary.task_id.id in previous_by_task
+        }
+        for model_name, fnames in DAILY_CARRY_LINES.items():
+            Line = self.env[model_name]
+            rows = Line.search_read([('diary_id', 'in', previous.ids)], list(fnames) + ['diary_id'], load=None)
+            Line.create([
+                dict({fname: row[fname] for fname in fnames}, diary_id=new_by_previous[row['diary_id']])
+                for row in rows
+            ])
+        return diaries
+
+    # === Timesheets ===
+    @api.model
+    def _timesheet_domain(self):
+        """Diaries whose crew hours are turned into timesheets"""
+        return [
+            ('state', '=', 'approved'),
+            ('worker_ids', '!=', False),
+            ('total_work_hours', '>', 0),
+            ('project_id.allow_timesheets', '=', True),
+        ]
+
+    def _generate_timesheets(self):
+        """Create one timesheet line per present worker of each approved diary.
+
+        Each worker books the hours of one shift, not the whole site day:
+        the diary does not record who worked which shift, so the present
+        workers are split in order into equal groups over the worked
+        shifts. Lines can be corrected when the actual rota differed.
+        Workers that already have a line for a diary are skipped, so the
+        diaries can be processed again safely. Returns the created lines.
+        """
+        Timesheet = self.env['account.analytic.line']
+        diaries = self.filtered_domain(self._timesheet_domain())
+        if not diaries:
+            return Timesheet
+        existing = {
+            (row['diary_id'], row['employee_id'])
+            for row in Timesheet.search_read(
+                [('diary_id', 'in', diaries.ids)], ['diary_id', 'employee_id'], load=None)
+        }
+        diaries.fetch([
+            'name', 'date', 'project_id', 'task_id', 'shift1_hours', 'shift2_hours', 'shift3_hours', 'worker_ids',
+        ])
+        vals_list = []
+        for diary in diaries:
+            shifts = [hours for hours in (diary.shift1_hours, diary.shift2_hours, diary.shift3_hours) if hours > 0]
+            workers = diary.worker_ids
+            for index, employee in enumerate(workers):
+                if (diary.id, employee.id) in existing:
+                    continue
+                vals_list.append({
+                    'name': _('Градежен дневник %s', diary.name),
+                    'date': diary.date,
+                    'project_id': diary.project_id.id,
+                    'task_id': diary.task_id.id,
+                    'employee_id': employee.id,
+                    'unit_amount': shifts[index * len(shifts) // len(workers)],
+                    'diary_id': diary.id,
+                })
+
+        timesheet_ids = []
+        for batch in split_every(TIMESHEET_BATCH_SIZE, vals_list, list):
+            timesheet_ids += Timesheet.create(batch).ids
+        return Timesheet.browse(timesheet_ids)
+
+    @api.model
+    def _cron_generate_timesheets(self, batch_size=500):
+        """Generate the timesheets of approved diaries that have none yet.
+
+        Each run processes at most ``batch_size`` diaries, oldest first, and
+        reports the rest to the scheduler like the daily diary job.
+        """
+        domain = self._timesheet_domain() + [('timesheet_ids', '=', False)]
+        remaining = self.search_count(domain)
+        diaries = self.search(domain, order='date, id', limit=batch_size)
+        diaries._generate_timesheets()
+        self.env['ir.cron']._notify_progress(done=len(diaries), remaining=remaining - len(diaries))
+        return True
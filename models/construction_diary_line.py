@@ -11,6 +11,7 @@ class ConstructionDiaryWorkerLine(models.Model):
         'construction.diary',
         string='Дневник',
         required=True,
+        index=True,
         ondelete='cascade'
     )
 
@@ -38,6 +39,7 @@ class ConstructionDiaryVehicleLine(models.Model):
         'construction.diary',
         string='Дневник',
         required=True,
+        index=True,
         ondelete='cascade'
     )
 
@@ -52,6 +54,7 @@ class ConstructionDiaryVehicleLine(models.Model):
     vehicle_id = fields.Many2one(
         'fleet.vehicle',
         string='Возило',
+        index='btree_not_null',
         help='Поврзување со fleet возило (опционално)'
     )
 
@@ -71,6 +74,7 @@ class ConstructionDiaryMachineLine(models.Model):
         'construction.diary',
         string='Дневник',
         required=True,
+        index=True,
         ondelete='cascade'
     )
 
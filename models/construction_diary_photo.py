@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import base64
+import logging
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+from odoo.tools import image_process
+
+_logger = logging.getLogger(__name__)
+
+
+class ConstructionDiaryPhoto(models.Model):
+    _name = 'construction.diary.photo'
+    _description = 'Construction Diary Photo'
+    _order = 'id desc'
+
+    name = fields.Char(
+        string='Назив',
+        required=True
+    )
+
+    checksum = fields.Char(
+        string='Контролна сума',
+        required=True,
+        readonly=True,
+        index=True,
+        help='SHA1 на оригиналната фотографија, за препознавање дупликати'
+    )
+
+    image = fields.Image(
+        string='Фотографија',
+        help='Намалена верзија на оригиналот'
+    )
+
+    thumbnail = fields.Image(
+        string='Мала слика',
+        related='image',
+        max_width=256,
+        max_height=256,
+        store=True
+    )
+
+    diary_ids = fields.Many2many(
+        'construction.diary',
+        'construction_diary_photo_image_rel',
+        'photo_id',
+        'diary_id',
+        string='Дневнички записи'
+    )
+
+    _sql_constraints = [
+        ('checksum_uniq', 'unique(checksum)', 'Фотографијата веќе постои!'),
+    ]
+
+    @api.model
+    def _get_or_create_from_attachments(self, attachments):
+        """Return a ``{checksum: photo}`` map for the image ``attachments``.
+
+        Photos already stored for any diary are reused; the others are
+        created from the downscaled originals in one batch. Attachments
+        whose image cannot be decoded (e.g. HEIC) are left out of the map.
+        """
+        checksums = set(attachments.mapped('checksum'))
+        photos = {photo.checksum: photo for photo in self.search([('checksum', 'in', list(checksums))])}
+        max_px = int(self.env['ir.config_parameter'].sudo().get_param('eskon_workorder.photo_max_px', 1920))
+
+        vals_list = []
+        seen = set(photos)
+        for attachment in attachments:
+            if attachment.checksum in seen:
+                continue
+            seen.add(attachment.checksum)
+            try:
+                image = image_process(attachment.raw, size=(max_px, max_px))
+            except (UserError, ValueError):
+                _logger.info("Keeping undecodable diary photo %s as uploaded", attachment.id)
+                continue
+            vals_list.append({
+                'name': attachment.name or _('Фотографија'),
+                'checksum': attachment.checksum,
+                'image': base64.b64encode(image),
+            })
+        for photo in self.create(vals_list):
+            photos[photo.checksum] = photo
+        return photos
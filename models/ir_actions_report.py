@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from odoo import api, models
+
+# Reports of this module whose renders are profiled when sampled
+PROFILED_REPORTS = (
+    'eskon_workorder.report_construction_book',
+    'eskon_workorder.report_construction_book_entry',
+    'eskon_workorder.report_construction_diary',
+)
+
+
+class IrActionsReport(models.Model):
+    _inherit = 'ir.actions.report'
+
+    def _render_qweb_pdf(self, report_ref, res_ids=None, data=None):
+        Log = self.env['workorder.profile.log']
+        report = Log._is_sampled() and self._get_report(report_ref)
+        if not report or report.report_name not in PROFILED_REPORTS:
+            return super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+        profiling = self.with_context(workorder_profiling=True)
+        return Log._profile(
+            '%s.pdf' % report.report_name,
+            self.env[report.model].browse(res_ids or []),
+            lambda _docs: super(IrActionsReport, profiling)._render_qweb_pdf(report_ref, res_ids=res_ids, data=data),
+        )
+
+    def _render_qweb_html(self, report_ref, docids, data=None):
+        Log = self.env['workorder.profile.log']
+        report = Log._is_sampled() and self._get_report(report_ref)
+        if not report or report.report_name not in PROFILED_REPORTS:
+            return super()._render_qweb_html(report_ref, docids, data=data)
+        profiling = self.with_context(workorder_profiling=True)
+        return Log._profile(
+            '%s.html' % report.report_name,
+            self.env[report.model].browse(docids or []),
+            lambda _docs: super(IrActionsReport, profiling)._render_qweb_html(report_ref, docids, data=data),
+        )
+
+    @api.model
+    def _unlink_cached_pdfs(self, records):
+        """Remove the PDFs cached for ``records`` by the reports' ``attachment``
+
+        The cache names follow ``'<record name> (<write date>).pdf'`` as set on
+        the report actions of this module.
+        """
+        attachments = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', records._name),
+            ('res_id', 'in', records.ids),
+            ('mimetype', '=', 'application/pdf'),
+            ('name', '=like', '% (%).pdf'),
+        ])
+        names = {record.id: record.name for record in records}
+        attachments.filtered(
+            lambda attachment: attachment.name.startswith('%s (' % names[attachment.res_id])
+        ).unlink()
+        return True
@@ -1,10 +1,26 @@
 # -*- coding: utf-8 -*-
+from collections import defaultdict
+
+from markupsafe import Markup
+
 from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+
+from .workorder_kpi import KPI_TASK_FIELDS
+from .workorder_profile import profiled
+
+# Workorder states still to be done, offered to crews nearby
+OPEN_STATES = ('draft', 'planned', 'in_progress', 'on_hold')
+
+# Workorders listed by the nearby workorders planner
+NEARBY_LIMIT = 50
 
 
 class ProjectTask(models.Model):
-    _inherit = 'project.task'
+    _name = 'project.task'
+    _inherit = ['project.task', 'workorder.fulltext.mixin', 'workorder.geo.mixin']
+    _fulltext_fields = ('work_description', 'completion_notes', 'work_location_notes', 'material_notes')
 
     # === Workorder Type ===
     is_workorder = fields.Boolean(
@@ -62,9 +78,18 @@ class ProjectTask(models.Model):
     primary_vehicle_id = fields.Many2one(
         'fleet.vehicle',
         string='Главно возило',
+        index='btree_not_null',
         help='Примарно возило за транспорт'
     )
 
+    warehouse_id = fields.Many2one(
+        'stock.warehouse',
+        string='Магацин',
+        domain="[('company_id', '=', company_id)]",
+        help='Магацин од кој се издава и во кој се враќа опремата; '
+             'празно = првиот магацин на компанијата'
+    )
+
     # === Equipment & Materials ===
     equipment_ids = fields.Many2many(
         'product.product',
@@ -184,28 +209,61 @@ class ProjectTask(models.Model):
         help='Забелешки и коментари по завршување на работата'
     )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        tasks = super().create(vals_list)
+        self.env['workorder.kpi']._refresh(tasks.filtered('is_workorder').ids)
+        return tasks
+
+    def write(self, vals):
+        res = super().write(vals)
+        if any(field in vals for field in KPI_TASK_FIELDS):
+            tasks = self if 'is_workorder' in vals else self.filtered('is_workorder')
+            self.env['workorder.kpi']._refresh(tasks.ids)
+        return res
+
     # === Computed Fields ===
     @api.depends('worker_ids')
     def _compute_total_workers(self):
+        # Saved tasks are counted in one grouped query on the relation
+        # table; tasks being edited in a form count their cached workers.
+        counts = {}
+        task_ids = self.filtered('id').ids
+        if task_ids:
+            self.env.cr.execute(SQL(
+                "SELECT task_id, COUNT(*) FROM project_task_worker_rel WHERE task_id = ANY(%s) GROUP BY task_id",
+                task_ids,
+            ))
+            counts = dict(self.env.cr.fetchall())
         for task in self:
-            task.total_workers = len(task.worker_ids)
+            task.total_workers = counts.get(task.id, 0) if task.id else len(task.worker_ids)
 
     @api.depends('equipment_line_ids', 'equipment_line_ids.state')
     def _compute_equipment_stats(self):
+        total = defaultdict(int)
+        open_lines = defaultdict(int)
+        for task, state, count in self.env['workorder.equipment.line']._read_group(
+                [('task_id', 'in', self.filtered('id').ids)], ['task_id', 'state'], ['__count']):
+            total[task.id] += count
+            if state not in ('returned', 'consumed'):
+                open_lines[task.id] += count
         for task in self:
-            task.total_equipment_lines = len(task.equipment_line_ids)
-            if task.equipment_line_ids:
-                task.equipment_all_returned = all(
-                    line.state in ['returned', 'consumed']
-                    for line in task.equipment_line_ids
-                )
-            else:
-                task.equipment_all_returned = True
+            if not task.id:
+                lines = task.equipment_line_ids
+                total[task.id] = len(lines)
+                open_lines[task.id] = len(lines.filtered(lambda l: l.state not in ('returned', 'consumed')))
+            task.total_equipment_lines = total[task.id]
+            task.equipment_all_returned = not open_lines[task.id]
 
     @api.depends('diary_ids')
     def _compute_diary_count(self):
+        counts = {
+            task.id: count
+            for task, count in self.env['construction.diary']._read_group(
+                [('task_id', 'in', self.filtered('id').ids)], ['task_id'], ['__count'])
+        }
         for task in self:
-            task.diary_count = len(task.diary_ids)
+            task.diary_count = counts.get(task.id, 0) if task.id else len(task.diary_ids)
 
     def action_view_diary(self):
         """Open construction diary entries for this workorder"""
@@ -222,7 +280,36 @@ class ProjectTask(models.Model):
             },
         }
 
+    def action_view_nearby_workorders(self):
+        """List the open workorders nearest to this one, by distance"""
+        self.ensure_one()
+        if not self._has_site_coordinates():
+            raise ValidationError(_('Внесете ги координатите на локацијата на работниот налог!'))
+        nearest = self._geo_nearest(
+            self.site_latitude, self.site_longitude,
+            limit=NEARBY_LIMIT,
+            domain=[
+                ('is_workorder', '=', True),
+                ('workorder_state', 'in', OPEN_STATES),
+                ('id', '!=', self.id),
+            ],
+        )
+        origin = '%s,%s' % (self.site_latitude, self.site_longitude)
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Блиски налози: %s', self.name),
+            'res_model': 'project.task',
+            'view_mode': 'list,form',
+            'views': [(self.env.ref('eskon_workorder.view_workorder_nearby_list').id, 'list'), (False, 'form')],
+            'domain': [('site_near', '=', origin), ('id', 'in', [task.id for task, _distance in nearest])],
+            'context': {
+                'geo_origin': origin,
+                'create': False,
+            },
+        }
+
     # === Actions ===
+    @profiled('project.task.action_start_work')
     def action_start_work(self):
         """Start the workorder"""
         self.ensure_one()
@@ -232,6 +319,7 @@ class ProjectTask(models.Model):
         })
         return True
 
+    @profiled('project.task.action_complete_work')
     def action_complete_work(self):
         """Complete the workorder"""
         self.ensure_one()
@@ -273,8 +361,47 @@ class ProjectTask(models.Model):
         self.write({
             'workorder_state': 'planned',
         })
+        warning = self._get_booking_conflict_warning()
+        if warning:
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'title': _('Двојно доделени ресурси'),
+                    'message': warning,
+                    'type': 'warning',
+                    'sticky': True,
+                    'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
+                },
+            }
         return True
 
+    def _get_booking_conflict_warning(self):
+        """Describe the crew/vehicle double bookings of these workorders"""
+        conflicts = self.env['workorder.conflict']._find_conflicts(task_ids=self.ids)
+        if not conflicts:
+            return False
+        employees = self.env['hr.employee'].browse({c['employee_id'] for c in conflicts if c['employee_id']})
+        vehicles = self.env['fleet.vehicle'].browse({c['vehicle_id'] for c in conflicts if c['vehicle_id']})
+        others = self.browse({c['other_task_id'] for c in conflicts})
+        names = {
+            'employee': {employee.id: employee.name for employee in employees},
+            'vehicle': {vehicle.id: vehicle.display_name for vehicle in vehicles},
+        }
+        task_names = {task.id: task.name for task in others}
+        lines = []
+        for conflict in conflicts:
+            resource_type = conflict['resource_type']
+            resource_id = conflict['employee_id'] if resource_type == 'employee' else conflict['vehicle_id']
+            lines.append(_(
+                '%(resource)s е доделен и на „%(task)s“ (%(start)s - %(end)s)',
+                resource=names[resource_type][resource_id],
+                task=task_names[conflict['other_task_id']],
+                start=fields.Datetime.context_timestamp(self, conflict['conflict_start']).strftime('%d.%m.%Y %H:%M'),
+                end=fields.Datetime.context_timestamp(self, conflict['conflict_end']).strftime('%d.%m.%Y %H:%M'),
+            ))
+        return '\n'.join(lines)
+
     def action_reset_to_draft(self):
         """Reset workorder to draft"""
         self.ensure_one()
@@ -285,152 +412,231 @@ class ProjectTask(models.Model):
         })
         return True
 
+    @profiled('project.task.action_create_stock_request')
     def action_create_stock_request(self):
         """Create stock picking request for equipment/materials"""
         self.ensure_one()
         if not self.equipment_line_ids:
             raise ValidationError(_('Нема опрема/материјали за барање!'))
+        pickings = self._create_stock_requests()
+        return self._action_view_pickings(pickings, _('Магацински документ'))
+
+    @profiled('project.task.action_create_stock_request_batch')
+    def action_create_stock_request_batch(self):
+        """Create consolidated stock requests for all selected workorders"""
+        pickings = self.filtered('is_workorder')._create_stock_requests()
+        return self._action_view_pickings(pickings, _('Магацински документи'))
+
+    def _get_workorder_warehouses(self):
+        """Return ``{task: warehouse}``, defaulting to the first warehouse of the company"""
+        defaults = {}
+        warehouses = {}
+        for task in self:
+            if not task.warehouse_id and task.company_id not in defaults:
+                defaults[task.company_id] = self.env['stock.warehouse'].search(
+                    [('company_id', '=', task.company_id.id)], limit=1)
+            warehouses[task] = task.warehouse_id or defaults[task.company_id]
+        return warehouses
+
+    def _create_stock_requests(self):
+        """Issue the draft equipment lines of all workorders in ``self``.
+
+        Lines are grouped by company, warehouse and scheduled day and every
+        group gets one outgoing picking of its warehouse. Pickings and moves
+        are created with one batched ``create`` each; the lines get their
+        state in one ``write`` and their picking with one ``write`` each.
+        """
+        lines = self.env['workorder.equipment.line'].search([
+            ('task_id', 'in', self.ids),
+            ('state', '=', 'draft'),
+        ])
+        if not lines:
+            raise ValidationError(_('Нема опрема/материјали за барање!'))
 
-        # Find or create picking type for workorder requests
-        picking_type = self.env['stock.picking.type'].search([
-            ('code', '=', 'outgoing'),
-            ('warehouse_id.company_id', '=', self.company_id.id),
-        ], limit=1)
-
-        if not picking_type:
-            raise ValidationError(_('Не е пронајден тип на испорака. Конфигурирајте го магацинот!'))
-
-        # Get locations
-        location_src = picking_type.default_location_src_id
-        location_dest = self.env.ref('stock.stock_location_customers', raise_if_not_found=False)
-        if not location_dest:
-            location_dest = picking_type.default_location_dest_id
-
-        # Create picking
-        picking_vals = {
-            'picking_type_id': picking_type.id,
-            'partner_id': self.partner_id.id if self.partner_id else False,
-            'origin': self.name,
-            'location_id': location_src.id,
-            'location_dest_id': location_dest.id,
-            'scheduled_date': self.planned_start or fields.Datetime.now(),
-            'note': f'Работен налог: {self.name}\nЛокација: {self.work_location or ""}',
-        }
-
-        picking = self.env['stock.picking'].create(picking_vals)
-
-        # Create stock moves for each equipment line
-        for line in self.equipment_line_ids.filtered(lambda l: l.state == 'draft'):
-            move_vals = {
-                'name': line.product_id.name,
-                'product_id': line.product_id.id,
-                'product_uom_qty': line.qty_issued,
-                'product_uom': line.product_uom_id.id,
-                'picking_id': picking.id,
-                'location_id': location_src.id,
+        now = fields.Datetime.now()
+        location_customers = self.env.ref('stock.stock_location_customers', raise_if_not_found=False)
+
+        # Group lines by (company, picking type of the warehouse, scheduled day)
+        warehouses = lines.task_id._get_workorder_warehouses()
+        groups = defaultdict(list)
+        for line in lines:
+            task = line.task_id
+            picking_type = warehouses[task].out_type_id
+            if not picking_type:
+                raise ValidationError(_('Не е пронајден тип на испорака. Конфигурирајте го магацинот!'))
+            day = fields.Date.context_today(self, task.planned_start or now)
+            groups[(task.company_id, picking_type, day)].append(line.id)
+
+        group_keys = list(groups)
+        group_lines = {key: lines.browse(groups[key]) for key in group_keys}
+
+        picking_vals_list = []
+        for key in group_keys:
+            company, picking_type, day = key
+            tasks = group_lines[key].task_id
+            location_dest = location_customers or picking_type.default_location_dest_id
+            picking_vals_list.append({
+                'picking_type_id': picking_type.id,
+                'partner_id': tasks.partner_id.id if len(tasks.partner_id) == 1 else False,
+                'origin': ', '.join(tasks.mapped('name')),
+                'location_id': picking_type.default_location_src_id.id,
                 'location_dest_id': location_dest.id,
-            }
-            self.env['stock.move'].create(move_vals)
-
-            # Update equipment line with picking reference
-            line.write({
-                'picking_id': picking.id,
-                'state': 'issued',
-                'issue_date': fields.Datetime.now(),
+                'scheduled_date': min(task.planned_start or now for task in tasks),
+                'note': '\n'.join(
+                    f'Работен налог: {task.name}\nЛокација: {task.work_location or ""}'
+                    for task in tasks
+                ),
             })
+        pickings = self.env['stock.picking'].create(picking_vals_list)
+
+        move_vals_list = []
+        for key, picking in zip(group_keys, pickings):
+            for line in group_lines[key]:
+                move_vals_list.append({
+                    'name': line.product_id.name,
+                    'product_id': line.product_id.id,
+                    'product_uom_qty': line.qty_issued,
+                    'product_uom': line.product_uom_id.id,
+                    'picking_id': picking.id,
+                    'location_id': picking.location_id.id,
+                    'location_dest_id': picking.location_dest_id.id,
+                })
+        self.env['stock.move'].create(move_vals_list)
+
+        lines.write({
+            'state': 'issued',
+            'issue_date': now,
+        })
+        task_pickings = defaultdict(lambda: self.env['stock.picking'])
+        for key, picking in zip(group_keys, pickings):
+            group_lines[key].write({'picking_id': picking.id})
+            for task in group_lines[key].task_id:
+                task_pickings[task] |= picking
+
+        tasks = lines.task_id
+        tasks._message_log_batch(bodies={
+            task.id: Markup(_('Креиран магацински документ: %s')) % Markup(', ').join(
+                picking._get_html_link() for picking in task_pickings[task]
+            )
+            for task in tasks
+        })
+        return pickings
 
-        # Link picking to workorder (store in notes or create field)
-        self.message_post(
-            body=_('Креиран магацински документ: <a href="/web#id=%s&model=stock.picking">%s</a>') % (picking.id, picking.name)
-        )
-
-        return {
+    def _action_view_pickings(self, pickings, name):
+        """Return an action opening ``pickings`` (form view for a single one)"""
+        action = {
             'type': 'ir.actions.act_window',
-            'name': _('Магацински документ'),
+            'name': name,
             'res_model': 'stock.picking',
-            'res_id': picking.id,
-            'view_mode': 'form',
             'target': 'current',
         }
+        if len(pickings) == 1:
+            action.update({'res_id': pickings.id, 'view_mode': 'form'})
+        else:
+            action.update({'domain': [('id', 'in', pickings.ids)], 'view_mode': 'list,form'})
+        return action
 
+    @profiled('project.task.action_return_equipment')
     def action_return_equipment(self):
         """Create return stock picking for equipment from field to warehouse"""
         self.ensure_one()
-
-        # Filter lines that have remaining quantity to return
-        lines_to_return = self.equipment_line_ids.filtered(
-            lambda l: l.state in ['issued', 'partial_return'] and l.qty_remaining > 0
-        )
-
-        if not lines_to_return:
+        pickings = self._return_equipment()
+        return self._action_view_pickings(pickings, _('Документ за враќање'))
+
+    @profiled('project.task.action_return_equipment_batch')
+    def action_return_equipment_batch(self):
+        """Return the outstanding equipment of all selected workorders"""
+        pickings = self.filtered('is_workorder')._return_equipment()
+        return self._action_view_pickings(pickings, _('Документи за враќање'))
+
+    def _return_equipment(self):
+        """Return all outstanding equipment of the workorders in ``self``.
+
+        Builds one incoming picking per warehouse the equipment was issued
+        from (the workorder's warehouse for lines without an issue
+        picking). Remaining
+        quantities are taken in memory before any write, so the lines are
+        updated with one ``write`` per returned quantity instead of a write
+        and a state pass per line.
+        """
+        lines = self.env['workorder.equipment.line'].search([
+            ('task_id', 'in', self.ids),
+            ('state', 'in', ['issued', 'partial_return']),
+            ('qty_remaining', '>', 0),
+        ])
+        if not lines:
             raise ValidationError(_('Нема опрема за враќање! Сите ставки се веќе вратени или потрошени.'))
 
-        # Find incoming picking type (returns)
-        picking_type = self.env['stock.picking.type'].search([
-            ('code', '=', 'incoming'),
-            ('warehouse_id.company_id', '=', self.company_id.id),
-        ], limit=1)
+        now = fields.Datetime.now()
+        location_customers = self.env.ref('stock.stock_location_customers', raise_if_not_found=False)
 
-        if not picking_type:
-            raise ValidationError(_('Не е пронајден тип на прием. Конфигурирајте го магацинот!'))
+        warehouses = lines.task_id._get_workorder_warehouses()
+        groups = defaultdict(list)
+        for line in lines:
+            warehouse = line.picking_id.picking_type_id.warehouse_id or warehouses[line.task_id]
+            picking_type = warehouse.in_type_id
+            if not picking_type:
+                raise ValidationError(_('Не е пронајден тип на прием. Конфигурирајте го магацинот!'))
+            groups[picking_type].append(line.id)
 
-        # Get locations - reverse of issue (customer -> stock)
-        location_src = self.env.ref('stock.stock_location_customers', raise_if_not_found=False)
-        if not location_src:
-            location_src = picking_type.default_location_src_id
-        location_dest = picking_type.default_location_dest_id
-
-        # Create return picking
-        picking_vals = {
-            'picking_type_id': picking_type.id,
-            'partner_id': self.partner_id.id if self.partner_id else False,
-            'origin': f'Враќање: {self.name}',
-            'location_id': location_src.id,
-            'location_dest_id': location_dest.id,
-            'scheduled_date': fields.Datetime.now(),
-            'note': f'Враќање од работен налог: {self.name}\nЛокација: {self.work_location or ""}',
-        }
-
-        picking = self.env['stock.picking'].create(picking_vals)
+        group_keys = list(groups)
+        group_lines = {key: lines.browse(groups[key]) for key in group_keys}
 
-        # Create stock moves for each equipment line with remaining quantity
-        for line in lines_to_return:
-            move_vals = {
-                'name': f'Враќање: {line.product_id.name}',
-                'product_id': line.product_id.id,
-                'product_uom_qty': line.qty_remaining,
-                'product_uom': line.product_uom_id.id,
-                'picking_id': picking.id,
+        # Get locations - reverse of issue (customer -> stock)
+        picking_vals_list = []
+        for picking_type in group_keys:
+            tasks = group_lines[picking_type].task_id
+            location_src = location_customers or picking_type.default_location_src_id
+            picking_vals_list.append({
+                'picking_type_id': picking_type.id,
+                'partner_id': tasks.partner_id.id if len(tasks.partner_id) == 1 else False,
+                'origin': 'Враќање: %s' % ', '.join(tasks.mapped('name')),
                 'location_id': location_src.id,
-                'location_dest_id': location_dest.id,
-            }
-            self.env['stock.move'].create(move_vals)
-
-            # Update equipment line - mark as returned
-            new_qty_returned = line.qty_returned + line.qty_remaining
-            line.write({
-                'qty_returned': new_qty_returned,
-                'return_date': fields.Datetime.now(),
+                'location_dest_id': picking_type.default_location_dest_id.id,
+                'scheduled_date': now,
+                'note': '\n'.join(
+                    f'Враќање од работен налог: {task.name}\nЛокација: {task.work_location or ""}'
+                    for task in tasks
+                ),
+            })
+        pickings = self.env['stock.picking'].create(picking_vals_list)
+
+        move_vals_list = []
+        lines_by_qty_returned = defaultdict(list)
+        task_pickings = defaultdict(lambda: self.env['stock.picking'])
+        for picking_type, picking in zip(group_keys, pickings):
+            for line in group_lines[picking_type]:
+                qty_remaining = line.qty_remaining
+                move_vals_list.append({
+                    'name': f'Враќање: {line.product_id.name}',
+                    'product_id': line.product_id.id,
+                    'product_uom_qty': qty_remaining,
+                    'product_uom': line.product_uom_id.id,
+                    'picking_id': picking.id,
+                    'location_id': picking.location_id.id,
+                    'location_dest_id': picking.location_dest_id.id,
+                })
+                lines_by_qty_returned[line.qty_returned + qty_remaining].append(line.id)
+            for task in group_lines[picking_type].task_id:
+                task_pickings[task] |= picking
+        self.env['stock.move'].create(move_vals_list)
+
+        # Everything outstanding comes back, so every line ends up returned
+        for qty_returned, line_ids in lines_by_qty_returned.items():
+            lines.browse(line_ids).write({
+                'qty_returned': qty_returned,
+                'state': 'returned',
+                'return_date': now,
             })
-            # State will be updated by _compute_qty_remaining and action_return
-
-        # Update equipment line states
-        for line in lines_to_return:
-            line.action_return()
-
-        # Post message with link
-        self.message_post(
-            body=_('Креиран документ за враќање: <a href="/web#id=%s&model=stock.picking">%s</a>') % (picking.id, picking.name)
-        )
 
-        return {
-            'type': 'ir.actions.act_window',
-            'name': _('Документ за враќање'),
-            'res_model': 'stock.picking',
-            'res_id': picking.id,
-            'view_mode': 'form',
-            'target': 'current',
-        }
+        tasks = lines.task_id
+        tasks._message_log_batch(bodies={
+            task.id: Markup(_('Креиран документ за враќање: %s')) % Markup(', ').join(
+                picking._get_html_link() for picking in task_pickings[task]
+            )
+            for task in tasks
+        })
+        return pickings
 
     # === Constraints ===
     @api.constrains('planned_start', 'planned_end')
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models, tools
+from odoo.tools import SQL
+
+# Workorder states that hold their crew and vehicles for the planned interval
+BOOKED_STATES = ('planned', 'in_progress', 'on_hold')
+
+
+def _booked_predicate(alias):
+    """Return the predicate of the partial GiST index for task ``alias``"""
+    return SQL(
+        "%(t)s.is_workorder AND %(t)s.planned_start IS NOT NULL AND %(t)s.planned_end IS NOT NULL"
+        " AND %(t)s.workorder_state IN %(states)s",
+        t=SQL.identifier(alias),
+        states=BOOKED_STATES,
+    )
+
+
+class WorkorderConflict(models.Model):
+    _name = 'workorder.conflict'
+    _description = 'Workorder Crew/Vehicle Double Booking'
+    _auto = False
+    _order = 'conflict_start, resource_type, task_id'
+
+    resource_type = fields.Selection([
+        ('employee', 'Работник'),
+        ('vehicle', 'Возило'),
+    ], string='Ресурс', readonly=True)
+    employee_id = fields.Many2one('hr.employee', string='Работник', readonly=True)
+    vehicle_id = fields.Many2one('fleet.vehicle', string='Возило', readonly=True)
+    task_id = fields.Many2one('project.task', string='Работен налог', readonly=True)
+    other_task_id = fields.Many2one('project.task', string='Конфликтен налог', readonly=True)
+    conflict_start = fields.Datetime(string='Конфликт од', readonly=True)
+    conflict_end = fields.Datetime(string='Конфликт до', readonly=True)
+
+    def init(self):
+        # Planned intervals of booked workorders, as an indexed range; the
+        # overlap joins below repeat this expression and predicate verbatim.
+        self.env.cr.execute(SQL(
+            """
+            CREATE INDEX IF NOT EXISTS project_task_planned_range_gist
+                ON project_task USING gist (tsrange(planned_start, planned_end))
+             WHERE is_workorder AND planned_start IS NOT NULL AND planned_end IS NOT NULL
+               AND workorder_state IN %s
+            """,
+            BOOKED_STATES,
+        ))
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(SQL(
+            """
+            CREATE OR REPLACE VIEW %s AS (
+                SELECT ROW_NUMBER() OVER (ORDER BY c.resource_type, c.employee_id, c.vehicle_id,
+                                                   c.task_id, c.other_task_id) AS id,
+                       c.*
+                  FROM (%s) c
+            )
+            """,
+            SQL.identifier(self._table),
+            self._conflict_query(SQL('TRUE')),
+        ))
+
+    @api.model
+    def _conflict_query(self, task_filter):
+        """SQL selecting every overlapping crew/vehicle assignment.
+
+        ``task_filter`` restricts the first task of each pair (alias ``t1``).
+        Each conflict is listed from both sides of the pair.
+        """
+        booked = _booked_predicate('t1')
+        booked_other = _booked_predicate('t2')
+        task_vehicles = SQL(
+            """
+            SELECT task_id, vehicle_id FROM project_task_vehicle_rel
+             UNION
+            SELECT id, primary_vehicle_id FROM project_task WHERE primary_vehicle_id IS NOT NULL
+            """
+        )
+        return SQL(
+            """
+            SELECT 'employee' AS resource_type,
+                   r1.employee_id AS employee_id,
+                   NULL::integer AS vehicle_id,
+                   t1.id AS task_id,
+                   t2.id AS other_task_id,
+                   GREATEST(t1.planned_start, t2.planned_start) AS conflict_start,
+                   LEAST(t1.planned_end, t2.planned_end) AS conflict_end
+              FROM project_task t1
+              JOIN project_task t2
+                ON t2.id != t1.id AND %(booked_other)s
+               AND tsrange(t2.planned_start, t2.planned_end) && tsrange(t1.planned_start, t1.planned_end)
+              JOIN project_task_worker_rel r1 ON r1.task_id = t1.id
+              JOIN project_task_worker_rel r2 ON r2.task_id = t2.id AND r2.employee_id = r1.employee_id
+             WHERE %(booked)s AND %(task_filter)s
+             UNION ALL
+            SELECT 'vehicle',
+                   NULL::integer,
+                   v1.vehicle_id,
+                   t1.id,
+                   t2.id,
+                   GREATEST(t1.planned_start, t2.planned_start),
+                   LEAST(t1.planned_end, t2.planned_end)
+              FROM project_task t1
+              JOIN project_task t2
+                ON t2.id != t1.id AND %(booked_other)s
+               AND tsrange(t2.planned_start, t2.planned_end) && tsrange(t1.planned_start, t1.planned_end)
+              JOIN (%(task_vehicles)s) v1 ON v1.task_id = t1.id
+              JOIN (%(task_vehicles)s) v2 ON v2.task_id = t2.id AND v2.vehicle_id = v1.vehicle_id
+             WHERE %(booked)s AND %(task_filter)s
+            """,
+            booked=booked,
+            booked_other=booked_other,
+            task_vehicles=task_vehicles,
+            task_filter=task_filter,
+        )
+
+    @api.model
+    def _find_conflicts(self, date_from=None, date_to=None, task_ids=None):
+        """Return all double bookings in a window, in one query.
+
+        Every row is a dict with ``resource_type``, ``employee_id``,
+        ``vehicle_id``, ``task_id``, ``other_task_id``, ``conflict_start``
+        and ``conflict_end``. Only conflicts of ``task_ids`` are returned
+        when given.
+        """
+        self.env['project.task'].flush_model()
+        filters = [SQL('TRUE')]
+        if date_from and date_to:
+            filters.append(SQL(
+                "tsrange(t1.planned_start, t1.planned_end) && tsrange(%s, %s)", date_from, date_to))
+        if task_ids is not None:
+            filters.append(SQL("t1.id = ANY(%s)", list(task_ids)))
+        self.env.cr.execute(SQL(
+            "SELECT * FROM (%s) c ORDER BY conflict_start",
+            self._conflict_query(SQL(' AND ').join(filters)),
+        ))
+        return self.env.cr.dictfetchall()
@@ -1,6 +1,12 @@
 # -*- coding: utf-8 -*-
-from odoo import api, fields, models, _
+from collections import defaultdict
+
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError
+from odoo.tools import float_is_zero
+
+CUSTODY_FIELDS = ('state', 'qty_issued', 'qty_returned', 'qty_used')
+KPI_FIELDS = ('task_id', 'state', 'qty_issued', 'qty_returned')
 
 
 class WorkorderEquipmentLine(models.Model):
@@ -66,7 +72,7 @@ class WorkorderEquipmentLine(models.Model):
         ('partial_return', 'Делумно вратено'),
         ('returned', 'Целосно вратено'),
         ('consumed', 'Потрошено'),
-    ], string='Статус', default='draft')
+    ], string='Статус', default='draft', index=True)
 
     # Additional info
     serial_number = fields.Char(
@@ -101,6 +107,29 @@ class WorkorderEquipmentLine(models.Model):
         help='Вработен кој ја примил опремата'
     )
 
+    # Custody holders fixed when the line is issued; returns and consumption
+    # are booked against them even if the crew or vehicle changes later.
+    custody_employee_id = fields.Many2one(
+        'hr.employee',
+        string='Задолжен',
+        readonly=True,
+        copy=False
+    )
+
+    custody_vehicle_id = fields.Many2one(
+        'fleet.vehicle',
+        string='Задолжено возило',
+        readonly=True,
+        copy=False
+    )
+
+    custody_project_id = fields.Many2one(
+        'project.project',
+        string='Задолжено градилиште',
+        readonly=True,
+        copy=False
+    )
+
     # Stock integration (optional)
     picking_id = fields.Many2one(
         'stock.picking',
@@ -108,6 +137,130 @@ class WorkorderEquipmentLine(models.Model):
         help='Поврзан stock picking (реверс)'
     )
 
+    sync_key = fields.Char(
+        string='Клуч за синхронизација',
+        copy=False,
+        readonly=True,
+        help='Клуч генериран од уредот при офлајн внес; спречува двојно креирање'
+    )
+
+    _sql_constraints = [
+        ('sync_key_uniq', 'unique(sync_key)', 'Ставката е веќе синхронизирана!'),
+    ]
+
+    def init(self):
+        # Covers task_id lookups and the per-task state filters.
+        tools.create_index(self._cr, 'workorder_equipment_line_task_id_state_index',
+                           self._table, ['task_id', 'state'])
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        lines._log_custody_events({})
+        self.env['workorder.kpi']._refresh(lines.task_id.ids)
+        return lines
+
+    def write(self, vals):
+        before = None
+        if any(field in vals for field in CUSTODY_FIELDS):
+            before = {
+                line.id: (line.state, line.qty_issued, line.qty_returned, line.qty_used)
+                for line in self
+            }
+        old_tasks = self.task_id
+        res = super().write(vals)
+        if before is not None:
+            self._log_custody_events(before)
+        if any(field in vals for field in KPI_FIELDS):
+            self.env['workorder.kpi']._refresh((old_tasks | self.task_id).ids)
+        return res
+
+    def unlink(self):
+        tasks = self.task_id
+        res = super().unlink()
+        self.env['workorder.kpi']._refresh(tasks.ids)
+        return res
+
+    def _log_custody_events(self, before):
+        """Append custody ledger rows for the quantity changes since ``before``
+
+        ``before`` maps line ids to their previous (state, issued, returned,
+        used) values; draft lines hold nothing, so they count as zero.
+        Events are booked against the custody holders of the line.
+        """
+        holders = self._get_custody_holders()
+        vals_list = []
+        for line in self:
+            if line.state == 'draft':
+                continue
+            old_state, old_issued, old_returned, old_used = before.get(line.id, ('draft', 0.0, 0.0, 0.0))
+            if old_state == 'draft':
+                old_issued = old_returned = old_used = 0.0
+            employee_id, vehicle_id, project_id = holders[line.id]
+            for event_type, delta in (
+                ('issue', line.qty_issued - old_issued),
+                ('return', line.qty_returned - old_returned),
+                ('consume', line.qty_used - old_used),
+            ):
+                if float_is_zero(delta, precision_rounding=line.product_uom_id.rounding or 0.01):
+                    continue
+                vals_list.append({
+                    'event_type': event_type,
+                    'line_id': line.id,
+                    'task_id': line.task_id.id,
+                    'product_id': line.product_id.id,
+                    'quantity': delta,
+                    'employee_id': employee_id,
+                    'issued_by_id': line.issued_by_id.id,
+                    'received_by_id': line.received_by_id.id,
+                    'vehicle_id': vehicle_id,
+                    'project_id': project_id,
+                })
+        if vals_list:
+            self.env['workorder.equipment.custody'].sudo()._record(vals_list)
+
+    def _get_custody_holders(self):
+        """Return ``{line id: (employee, vehicle, project ids)}`` for issued lines.
+
+        Lines without stored holders get them now: from their first issue
+        event if the ledger already has one, otherwise from the receiver (or
+        team leader), vehicle and project of the workorder at issue time.
+        """
+        issued = self.filtered(lambda line: line.state != 'draft')
+        missing = issued.filtered(lambda line: not (
+            line.custody_employee_id or line.custody_vehicle_id or line.custody_project_id))
+        first_issue = {}
+        if missing:
+            for event in self.env['workorder.equipment.custody'].sudo().search(
+                    [('line_id', 'in', missing.ids), ('event_type', '=', 'issue')], order='id desc'):
+                first_issue[event.line_id.id] = event
+
+        holders = {}
+        to_store = defaultdict(list)
+        for line in issued:
+            if line in missing:
+                source = first_issue.get(line.id)
+                if source:
+                    holder = (source.employee_id.id, source.vehicle_id.id, source.project_id.id)
+                else:
+                    task = line.task_id
+                    holder = (
+                        (line.received_by_id or task.team_leader_id).id,
+                        task.primary_vehicle_id.id,
+                        task.project_id.id,
+                    )
+                to_store[holder].append(line.id)
+            else:
+                holder = (line.custody_employee_id.id, line.custody_vehicle_id.id, line.custody_project_id.id)
+            holders[line.id] = holder
+        for (employee_id, vehicle_id, project_id), line_ids in to_store.items():
+            self.browse(line_ids).write({
+                'custody_employee_id': employee_id,
+                'custody_vehicle_id': vehicle_id,
+                'custody_project_id': project_id,
+            })
+        return holders
+
     @api.depends('qty_issued', 'qty_returned', 'qty_used')
     def _compute_qty_remaining(self):
         for line in self:
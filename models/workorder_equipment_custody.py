@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+from odoo import api, fields, models, _
+from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+
+
+CUSTODY_DIMENSIONS = ('employee_id', 'vehicle_id', 'project_id')
+
+
+class WorkorderEquipmentCustody(models.Model):
+    _name = 'workorder.equipment.custody'
+    _description = 'Workorder Equipment Custody Ledger'
+    _order = 'date desc, id desc'
+
+    date = fields.Datetime(
+        string='Датум',
+        required=True,
+        readonly=True,
+        index=True,
+        default=fields.Datetime.now
+    )
+
+    event_type = fields.Selection([
+        ('issue', 'Издавање'),
+        ('return', 'Враќање'),
+        ('consume', 'Потрошувачка'),
+    ], string='Настан', required=True, readonly=True)
+
+    line_id = fields.Many2one(
+        'workorder.equipment.line',
+        string='Ставка',
+        readonly=True,
+        index=True,
+        ondelete='set null'
+    )
+
+    task_id = fields.Many2one(
+        'project.task',
+        string='Работен налог',
+        readonly=True,
+        index=True,
+        ondelete='set null'
+    )
+
+    product_id = fields.Many2one(
+        'product.product',
+        string='Опрема/Материјал',
+        required=True,
+        readonly=True
+    )
+
+    quantity = fields.Float(
+        string='Количина',
+        digits='Product Unit of Measure',
+        readonly=True,
+        help='Количина на настанот (негативна за корекции)'
+    )
+
+    employee_id = fields.Many2one(
+        'hr.employee',
+        string='Задолжен',
+        readonly=True,
+        help='Вработен кој ја држи опремата'
+    )
+
+    issued_by_id = fields.Many2one(
+        'hr.employee',
+        string='Издал',
+        readonly=True
+    )
+
+    received_by_id = fields.Many2one(
+        'hr.employee',
+        string='Примил',
+        readonly=True
+    )
+
+    vehicle_id = fields.Many2one(
+        'fleet.vehicle',
+        string='Возило',
+        readonly=True
+    )
+
+    project_id = fields.Many2one(
+        'project.project',
+        string='Градилиште',
+        readonly=True
+    )
+
+    def write(self, vals):
+        raise ValidationError(_('Записите во евиденцијата на задолжување не може да се менуваат!'))
+
+    def unlink(self):
+        raise ValidationError(_('Записите во евиденцијата на задолжување не може да се бришат!'))
+
+    @api.model
+    def _record(self, vals_list):
+        """Append ledger rows and apply their deltas to the balances"""
+        events = self.create(vals_list)
+        self.env['workorder.equipment.custody.balance']._apply_events(events)
+        return events
+
+
+class WorkorderEquipmentCustodyBalance(models.Model):
+    _name = 'workorder.equipment.custody.balance'
+    _description = 'Workorder Equipment Custody Balance'
+    _order = 'product_id'
+    _log_access = False
+
+    # Exactly one of the dimension fields is set on every row
+    employee_id = fields.Many2one(
+        'hr.employee',
+        string='Задолжен',
+        readonly=True,
+        ondelete='cascade'
+    )
+
+    vehicle_id = fields.Many2one(
+        'fleet.vehicle',
+        string='Возило',
+        readonly=True,
+        ondelete='cascade'
+    )
+
+    project_id = fields.Many2one(
+        'project.project',
+        string='Градилиште',
+        readonly=True,
+        ondelete='cascade'
+    )
+
+    product_id = fields.Many2one(
+        'product.product',
+        string='Опрема/Материјал',
+        required=True,
+        readonly=True,
+        ondelete='cascade'
+    )
+
+    quantity = fields.Float(
+        string='Задолжено',
+        digits='Product Unit of Measure',
+        readonly=True
+    )
+
+    def init(self):
+        # One partial unique index per dimension; it is both the upsert
+        # target and the index serving custody lookups.
+        for column in CUSTODY_DIMENSIONS:
+            self._cr.execute(SQL(
+                "CREATE UNIQUE INDEX IF NOT EXISTS %s ON %s (%s, product_id) WHERE %s IS NOT NULL",
+                SQL.identifier(f'{self._table}_{column}_product_uniq'),
+                SQL.identifier(self._table),
+                SQL.identifier(column),
+                SQL.identifier(column),
+            ))
+
+    @api.model
+    def _apply_events(self, events):
+        """Add the quantity deltas of ``events`` to the balance rows"""
+        for column in CUSTODY_DIMENSIONS:
+            deltas = defaultdict(float)
+            for event in events:
+                holder = event[column]
+                if not holder:
+                    continue
+                sign = 1 if event.event_type == 'issue' else -1
+                deltas[(holder.id, event.product_id.id)] += sign * event.quantity
+            if not deltas:
+                continue
+            keys = list(deltas)
+            self._cr.execute(SQL(
+                """
+                INSERT INTO %(table)s (%(column)s, product_id, quantity)
+                     SELECT * FROM unnest(%(holders)s::int[], %(products)s::int[], %(quantities)s::numeric[])
+                ON CONFLICT (%(column)s, product_id) WHERE %(column)s IS NOT NULL
+                  DO UPDATE SET quantity = %(table)s.quantity + EXCLUDED.quantity
+                """,
+                table=SQL.identifier(self._table),
+                column=SQL.identifier(column),
+                holders=[holder_id for holder_id, _product_id in keys],
+                products=[product_id for _holder_id, product_id in keys],
+                quantities=[deltas[key] for key in keys],
+            ))
+        self.invalidate_model(['quantity'])
+
+    @api.model
+    def _rebuild(self):
+        """Recompute every balance row from the full ledger"""
+        self.env['workorder.equipment.custody'].flush_model()
+        self._cr.execute(SQL("DELETE FROM %s", SQL.identifier(self._table)))
+        for column in CUSTODY_DIMENSIONS:
+            self._cr.execute(SQL(
+                """
+                INSERT INTO %(table)s (%(column)s, product_id, quantity)
+                     SELECT %(column)s, product_id,
+                            SUM(CASE WHEN event_type = 'issue' THEN quantity ELSE -quantity END)
+                       FROM workorder_equipment_custody
+                      WHERE %(column)s IS NOT NULL
+                   GROUP BY %(column)s, product_id
+                """,
+                table=SQL.identifier(self._table),
+                column=SQL.identifier(column),
+            ))
+        self.invalidate_model()
+        return True
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL, html2plaintext
+
+# Text search configuration; 'simple' does no stemming, so it works for
+# Macedonian as well as for cable and product codes.
+FULLTEXT_CONFIG = 'simple'
+
+
+class WorkorderFulltextMixin(models.AbstractModel):
+    _name = 'workorder.fulltext.mixin'
+    _description = 'Full-text Search Document'
+
+    # Html/Text fields merged into the search document, set by each model
+    _fulltext_fields = ()
+
+    fulltext_document = fields.Text(
+        string='Документ за пребарување',
+        compute='_compute_fulltext_document',
+        store=True,
+        readonly=True,
+        prefetch=False,
+        help='Текст без HTML од описите, индексиран за пребарување по целосен текст'
+    )
+
+    fulltext = fields.Char(
+        string='Целосен текст',
+        compute='_compute_fulltext',
+        search='_search_fulltext'
+    )
+
+    def init(self):
+        super().init()
+        if self._abstract:
+            return
+        # Queries must repeat this exact expression to use the index.
+        self.env.cr.execute(SQL(
+            "CREATE INDEX IF NOT EXISTS %s ON %s USING gin (%s)",
+            SQL.identifier(f'{self._table}_fulltext_document_gin'),
+            SQL.identifier(self._table),
+            self._fulltext_vector(self._table),
+        ))
+
+    @api.model
+    def _fulltext_vector(self, alias):
+        return SQL(
+            "to_tsvector(%s::regconfig, COALESCE(%s, ''))",
+            FULLTEXT_CONFIG,
+            SQL.identifier(alias, 'fulltext_document'),
+        )
+
+    @api.model
+    def _fulltext_query(self, text):
+        return SQL("websearch_to_tsquery(%s::regconfig, %s)", FULLTEXT_CONFIG, text)
+
+    @api.depends(lambda self: self._fulltext_fields)
+    def _compute_fulltext_document(self):
+        for record in self:
+            parts = []
+            for fname in self._fulltext_fields:
+                value = record[fname]
+                if value and self._fields[fname].type == 'html':
+                    value = html2plaintext(value)
+                if value:
+                    parts.append(value.strip())
+            record.fulltext_document = '\n'.join(parts) or False
+
+    def _compute_fulltext(self):
+        self.fulltext = False
+
+    def _search_fulltext(self, operator, value):
+        if operator not in ('ilike', 'like', '=') or not isinstance(value, str):
+            raise UserError(_('Пребарувањето по целосен текст поддржува само текст.'))
+        return [('id', 'in', SQL(
+            "(SELECT id FROM %s WHERE %s @@ %s)",
+            SQL.identifier(self._table),
+            self._fulltext_vector(self._table),
+            self._fulltext_query(value),
+        ))]
+
+    @api.model
+    def _fulltext_terms(self, domain):
+        """Return the texts searched on ``fulltext`` by top-level ``domain`` leaves"""
+        return [
+            leaf[2] for leaf in domain or ()
+            if isinstance(leaf, (list, tuple)) and len(leaf) == 3
+            and leaf[0] == 'fulltext' and isinstance(leaf[2], str)
+        ]
+
+    @api.model
+    def _search(self, domain, offset=0, limit=None, order=None, **kwargs):
+        """Order full-text matches by relevance.
+
+        Only searches filtering on ``fulltext`` are ranked, with the best
+        matches first and the requested order breaking ties. Counts and
+        groupings are made without an order and are left untouched.
+        """
+        query = super()._search(domain, offset=offset, limit=limit, order=order, **kwargs)
+        terms = self._fulltext_terms(domain)
+        if terms and order and not query.is_empty():
+            query.order = SQL(
+                "ts_rank_cd(%s, %s) DESC, %s",
+                self._fulltext_vector(self._table),
+                self._fulltext_query(' '.join(terms)),
+                query.order or SQL.identifier(self._table, 'id'),
+            )
+        return query
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+import math
+import re
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
+
+# Grid cells per degree; 0.01 degree is about 1.1 km north-south
+GEO_GRID_SCALE = 100
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Coordinate pairs in pasted map links, most specific first:
+# Google place pins (!3d..!4d..), OpenStreetMap (mlat/mlon, #map=z/lat/lon),
+# Google/Apple query parameters, Google viewports (@lat,lon) and geo: URIs.
+_NUMBER = r'(-?\d{1,3}(?:\.\d+)?)'
+MAP_LINK_PATTERNS = [
+    re.compile(r'!3d' + _NUMBER + r'!4d' + _NUMBER),
+    re.compile(r'[?&]mlat=' + _NUMBER + r'&mlon=' + _NUMBER),
+    re.compile(r'#map=\d+(?:\.\d+)?/' + _NUMBER + r'/' + _NUMBER),
+    re.compile(r'[?&](?:q|ll|query|daddr|destination)=(?:loc:)?' + _NUMBER + r'(?:,|%2C)\s*' + _NUMBER),
+    re.compile(r'@' + _NUMBER + r',' + _NUMBER),
+    re.compile(r'geo:' + _NUMBER + r',' + _NUMBER),
+    re.compile(r'^\s*' + _NUMBER + r'\s*[,;]\s*' + _NUMBER + r'\s*$'),
+]
+
+
+def parse_map_link(text):
+    """Return ``(latitude, longitude)`` found in a map link or coordinate text"""
+    if not text:
+        return None
+    for pattern in MAP_LINK_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            latitude, longitude = float(match.group(1)), float(match.group(2))
+            if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+                return latitude, longitude
+    return None
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class WorkorderGeoMixin(models.AbstractModel):
+    _name = 'workorder.geo.mixin'
+    _description = 'Site Coordinates'
+
+    site_map_link = fields.Char(
+        string='Линк од мапа',
+        help='Залепете линк од Google Maps, OpenStreetMap или координати „ширина, должина“'
+    )
+
+    site_latitude = fields.Float(
+        string='Географска ширина',
+        digits=(10, 7)
+    )
+
+    site_longitude = fields.Float(
+        string='Географска должина',
+        digits=(10, 7)
+    )
+
+    site_grid_lat = fields.Integer(
+        string='Ќелија (ширина)',
+        compute='_compute_site_grid',
+        store=True
+    )
+
+    site_grid_lon = fields.Integer(
+        string='Ќелија (должина)',
+        compute='_compute_site_grid',
+        store=True
+    )
+
+    site_distance_km = fields.Float(
+        string='Оддалеченост (km)',
+        compute='_compute_site_distance_km',
+        digits=(16, 2),
+        help='Оддалеченост од точката „ширина,должина“ зададена со контекстот „geo_origin“'
+    )
+
+    site_near = fields.Char(
+        string='Блиску до',
+        compute='_compute_site_near',
+        search='_search_site_near',
+        help='Пребарување на лоцирани записи, подредени по оддалеченост од точката „ширина,должина“'
+    )
+
+    def init(self):
+        super().init()
+        if self._abstract:
+            return
+        # Unset coordinates are stored as 0, so located rows are those off
+        # (0, 0); the spatial queries repeat this predicate.
+        self.env.cr.execute(SQL(
+            "CREATE INDEX IF NOT EXISTS %s ON %s (site_grid_lat, site_grid_lon) WHERE %s",
+            SQL.identifier(f'{self._table}_site_grid_index'),
+            SQL.identifier(self._table),
+            self._geo_located_sql(self._table),
+        ))
+
+    @api.depends('site_latitude', 'site_longitude')
+    def _compute_site_grid(self):
+        for record in self:
+            if record._has_site_coordinates():
+                record.site_grid_lat = math.floor(record.site_latitude * GEO_GRID_SCALE)
+                record.site_grid_lon = math.floor(record.site_longitude * GEO_GRID_SCALE)
+            else:
+                record.site_grid_lat = record.site_grid_lon = False
+
+    @api.depends_context('geo_origin')
+    @api.depends('site_latitude', 'site_longitude')
+    def _compute_site_distance_km(self):
+        origin = self._geo_origin()
+        for record in self:
+            if origin and record._has_site_coordinates():
+                record.site_distance_km = _haversine_km(
+                    origin[0], origin[1], record.site_latitude, record.site_longitude)
+            else:
+                record.site_distance_km = False
+
+    def _compute_site_near(self):
+        self.site_near = False
+
+    def _search_site_near(self, operator, value):
+        if operator != '=' or not isinstance(value, str) or not parse_map_link(value):
+            raise UserError(_('Пребарувањето по близина бара точка „ширина,должина“.'))
+        return ['|', ('site_latitude', '!=', 0), ('site_longitude', '!=', 0)]
+
+    @api.model
+    def _geo_origin(self):
+        """Return the ``(latitude, longitude)`` of the ``geo_origin`` context"""
+        return parse_map_link(self.env.context.get('geo_origin'))
+
+    def _has_site_coordinates(self):
+        self.ensure_one()
+        return bool(self.site_latitude or self.site_longitude)
+
+    @api.constrains('site_latitude', 'site_longitude')
+    def _check_site_coordinates(self):
+        for record in self:
+            if not -90 <= record.site_latitude <= 90 or not -180 <= record.site_longitude <= 180:
+                raise ValidationError(_('Координатите на локацијата се надвор од дозволениот опсег!'))
+
+    @api.onchange('site_map_link')
+    def _onchange_site_map_link(self):
+        coordinates = parse_map_link(self.site_map_link)
+        if coordinates:
+            self.site_latitude, self.site_longitude = coordinates
+
+    @api.model
+    def _site_link_vals(self, vals):
+        """Fill the coordinates of ``vals`` from its map link, if any"""
+        coordinates = parse_map_link(vals.get('site_map_link'))
+        if coordinates and 'site_latitude' not in vals and 'site_longitude' not in vals:
+            vals['site_latitude'], vals['site_longitude'] = coordinates
+        return vals
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        return super().create([self._site_link_vals(vals) for vals in vals_list])
+
+    def write(self, vals):
+        return super().write(self._site_link_vals(dict(vals)) if 'site_map_link' in vals else vals)
+
+    # === Spatial queries ===
+    @api.model
+    def _geo_located_sql(self, alias):
+        table = SQL.identifier(alias)
+        return SQL("(%s.site_latitude <> 0 OR %s.site_longitude <> 0)", table, table)
+
+    @api.model
+    def _geo_distance_sql(self, alias, latitude, longitude):
+        """Great-circle distance in km from ``alias`` to the given point"""
+        table = SQL.identifier(alias)
+        return SQL(
+            """%(r)s * 2 * ASIN(LEAST(1.0, SQRT(
+                   POWER(SIN(RADIANS(%(t)s.site_latitude - %(lat)s) / 2), 2)
+                 + COS(RADIANS(%(lat)s)) * COS(RADIANS(%(t)s.site_latitude))
+                 * POWER(SIN(RADIANS(%(t)s.site_longitude - %(lon)s) / 2), 2))))""",
+            r=EARTH_RADIUS_KM,
+            t=table,
+            lat=latitude,
+            lon=longitude,
+        )
+
+    @api.model
+    def _geo_search_radius(self, latitude, longitude, radius_km, domain=None, limit=None):
+        """Return ``[(record, distance_km)]`` within ``radius_km``, nearest first.
+
+        ``domain``, the grid cells overlapping the bounding box of the circle
+        and the exact distance are applied in a single query, so records
+        excluded by ``domain`` never take up the ``limit``.
+        """
+        dlat = radius_km / 111.32
+        dlon = radius_km / max(111.32 * math.cos(math.radians(latitude)), 0.01)
+        self.flush_model(['site_latitude', 'site_longitude', 'site_grid_lat', 'site_grid_lon'])
+        query = self._search(domain or [])
+        if query.is_empty():
+            return []
+        table = SQL.identifier(self._table)
+        distance = self._geo_distance_sql(self._table, latitude, longitude)
+        query.add_where(SQL(
+            """%(located)s
+               AND %(t)s.site_grid_lat BETWEEN %(lat_min)s AND %(lat_max)s
+               AND %(t)s.site_grid_lon BETWEEN %(lon_min)s AND %(lon_max)s
+               AND %(distance)s <= %(radius)s""",
+            located=self._geo_located_sql(self._table),
+            t=table,
+            lat_min=math.floor((latitude - dlat) * GEO_GRID_SCALE),
+            lat_max=math.floor((latitude + dlat) * GEO_GRID_SCALE),
+            lon_min=math.floor((longitude - dlon) * GEO_GRID_SCALE),
+            lon_max=math.floor((longitude + dlon) * GEO_GRID_SCALE),
+            distance=distance,
+            radius=radius_km,
+        ))
+        query.order = SQL("%s, %s", distance, SQL.identifier(self._table, 'id'))
+        query.limit = limit
+        self.env.cr.execute(query.select(SQL.identifier(self._table, 'id'), distance))
+        rows = self.env.cr.fetchall()
+        records = self.browse([record_id for record_id, _distance in rows])
+        return [(record, distance_km) for record, (_id, distance_km) in zip(records, rows)]
+
+    @api.model
+    def _geo_nearest(self, latitude, longitude, limit=20, domain=None, max_radius_km=200.0):
+        """Return the ``limit`` nearest records as ``[(record, distance_km)]``.
+
+        The search radius starts small and doubles until enough records
+        are found, so dense areas only touch a few grid cells.
+        """
+        radius = 2.0
+        while True:
+            result = self._geo_search_radius(latitude, longitude, radius, domain=domain, limit=limit)
+            if len(result) >= limit or radius >= max_radius_km:
+                return result
+            radius = min(radius * 2, max_radius_km)
+
+    @api.model
+    def _geo_near_origin(self, domain):
+        """Return the point of the first top-level ``site_near`` leaf of ``domain``"""
+        for leaf in domain or ():
+            if isinstance(leaf, (list, tuple)) and len(leaf) == 3 and leaf[0] == 'site_near':
+                return parse_map_link(leaf[2]) if isinstance(leaf[2], str) else None
+        return None
+
+    @api.model
+    def _search(self, domain, offset=0, limit=None, order=None, **kwargs):
+        """Order ``site_near`` searches by distance from the searched point.
+
+        The requested order breaks ties; counts and groupings are made
+        without an order and are left untouched.
+        """
+        query = super()._search(domain, offset=offset, limit=limit, order=order, **kwargs)
+        origin = self._geo_near_origin(domain)
+        if origin and order and not query.is_empty():
+            query.order = SQL(
+                "%s, %s",
+                self._geo_distance_sql(self._table, *origin),
+                query.order or SQL.identifier(self._table, 'id'),
+            )
+        return query
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+# Task fields the KPI row is derived from; writing any of them refreshes it
+KPI_TASK_FIELDS = (
+    'is_workorder', 'project_id', 'company_id', 'workorder_state', 'workorder_type',
+    'planned_start', 'planned_end', 'actual_start', 'actual_end', 'worker_ids',
+)
+
+# Columns read by the refresh query; only these are flushed before it
+KPI_FLUSH_FIELDS = {
+    'project.task': [
+        'is_workorder', 'project_id', 'company_id', 'workorder_state', 'workorder_type',
+        'planned_start', 'planned_end', 'actual_start', 'actual_end', 'total_workers',
+    ],
+    'workorder.equipment.line': ['task_id', 'state', 'qty_issued', 'qty_returned'],
+    'construction.diary': ['task_id', 'date'],
+}
+
+
+class WorkorderKpi(models.Model):
+    _name = 'workorder.kpi'
+    _description = 'Workorder KPI'
+    _order = 'planned_start desc, id desc'
+    _log_access = False
+
+    task_id = fields.Many2one('project.task', string='Работен налог', required=True, readonly=True, ondelete='cascade')
+    project_id = fields.Many2one('project.project', string='Проект', readonly=True)
+    company_id = fields.Many2one('res.company', string='Компанија', readonly=True)
+    workorder_state = fields.Selection([
+        ('draft', 'Нацрт'),
+        ('planned', 'Планиран'),
+        ('in_progress', 'Во тек'),
+        ('on_hold', 'Паузиран'),
+        ('completed', 'Завршен'),
+        ('cancelled', 'Откажан'),
+    ], string='Статус на налог', readonly=True)
+    workorder_type = fields.Selection([
+        ('installation', 'Инсталација'),
+        ('maintenance', 'Одржување'),
+        ('service', 'Сервис'),
+        ('inspection', 'Инспекција'),
+        ('project', 'Проект'),
+    ], string='Тип на работа', readonly=True)
+
+    planned_start = fields.Datetime(string='Планиран почеток', readonly=True)
+    planned_end = fields.Datetime(string='Планиран крај', readonly=True)
+    actual_start = fields.Datetime(string='Реален почеток', readonly=True)
+    actual_end = fields.Datetime(string='Реален крај', readonly=True)
+
+    planned_hours = fields.Float(string='Планирано траење (ч)', readonly=True, aggregator='sum')
+    actual_hours = fields.Float(string='Реално траење (ч)', readonly=True, aggregator='sum')
+    delay_hours = fields.Float(
+        string='Доцнење (ч)',
+        readonly=True,
+        aggregator='avg',
+        help='Реален крај во однос на планираниот крај (негативно = порано)'
+    )
+    is_late = fields.Boolean(string='Задоцнет', readonly=True)
+
+    total_workers = fields.Integer(string='Големина на тим', readonly=True, aggregator='avg')
+
+    qty_issued = fields.Float(string='Издадена опрема', readonly=True, aggregator='sum')
+    qty_returned = fields.Float(string='Вратена опрема', readonly=True, aggregator='sum')
+    return_ratio = fields.Float(string='Однос вратено/издадено', readonly=True, aggregator='avg')
+
+    diary_count = fields.Integer(string='Дневнички записи', readonly=True, aggregator='sum')
+    diary_days = fields.Integer(string='Денови со дневник', readonly=True, aggregator='sum')
+    work_days = fields.Integer(string='Работни денови', readonly=True, aggregator='sum')
+    diary_coverage = fields.Float(
+        string='Покриеност со дневник',
+        readonly=True,
+        aggregator='avg',
+        help='Денови со дневник / денови од реалниот почеток до крајот'
+    )
+
+    _sql_constraints = [
+        ('task_uniq', 'unique(task_id)', 'Работниот налог веќе има KPI запис!'),
+    ]
+
+    @api.model
+    def _refresh(self, task_ids=None):
+        """Recompute the KPI rows of ``task_ids`` (all workorders if None).
+
+        Equipment and diary figures are aggregated in SQL for the given
+        tasks only, and the rows are upserted in a single statement.
+        """
+        if task_ids is not None and not task_ids:
+            return
+        for model_name, fnames in KPI_FLUSH_FIELDS.items():
+            self.env[model_name].flush_model(fnames)
+
+        task_filter = SQL('TRUE') if task_ids is None else SQL('task_id = ANY(%s)', list(task_ids))
+        id_filter = SQL('TRUE') if task_ids is None else SQL('t.id = ANY(%s)', list(task_ids))
+
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM workorder_kpi k
+             USING project_task t
+             WHERE t.id = k.task_id AND %(id_filter)s AND t.is_workorder IS NOT TRUE
+            """,
+            id_filter=id_filter,
+        ))
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO workorder_kpi (
+                task_id, project_id, company_id, workorder_state, workorder_type,
+                planned_start, planned_end, actual_start, actual_end,
+                planned_hours, actual_hours, delay_hours, is_late, total_workers,
+                qty_issued, qty_returned, return_ratio,
+                diary_count, diary_days, work_days, diary_coverage
+            )
+            SELECT t.id, t.project_id, t.company_id, t.workorder_state, t.workorder_type,
+                   t.planned_start, t.planned_end, t.actual_start, t.actual_end,
+                   EXTRACT(EPOCH FROM t.planned_end - t.planned_start) / 3600.0,
+                   EXTRACT(EPOCH FROM t.actual_end - t.actual_start) / 3600.0,
+                   EXTRACT(EPOCH FROM t.actual_end - t.planned_end) / 3600.0,
+                   COALESCE(t.actual_end > t.planned_end, FALSE),
+                   COALESCE(t.total_workers, 0),
+                   COALESCE(eq.qty_issued, 0.0),
+                   COALESCE(eq.qty_returned, 0.0),
+                   CASE WHEN eq.qty_issued > 0 THEN eq.qty_returned / eq.qty_issued END,
+                   COALESCE(d.diary_count, 0),
+                   COALESCE(d.diary_days, 0),
+                   span.work_days,
+                   CASE WHEN span.work_days > 0 THEN COALESCE(d.diary_days, 0)::float / span.work_days END
+              FROM project_task t
+         LEFT JOIN (SELECT task_id, SUM(qty_issued) AS qty_issued, SUM(qty_returned) AS qty_returned
+                      FROM workorder_equipment_line
+                     WHERE %(task_filter)s AND state != 'draft'
+                  GROUP BY task_id) eq ON eq.task_id = t.id
+         LEFT JOIN (SELECT task_id, COUNT(*) AS diary_count, COUNT(DISTINCT date) AS diary_days
+                      FROM construction_diary
+                     WHERE %(task_filter)s
+                  GROUP BY task_id) d ON d.task_id = t.id
+         LEFT JOIN LATERAL (
+                    SELECT CASE WHEN t.actual_start IS NOT NULL
+                                THEN (COALESCE(t.actual_end, NOW() AT TIME ZONE 'UTC')::date - t.actual_start::date) + 1
+                           END AS work_days
+                   ) span ON TRUE
+             WHERE %(id_filter)s AND t.is_workorder
+            ON CONFLICT (task_id) DO UPDATE SET
+                project_id = EXCLUDED.project_id,
+                company_id = EXCLUDED.company_id,
+                workorder_state = EXCLUDED.workorder_state,
+                workorder_type = EXCLUDED.workorder_type,
+                planned_start = EXCLUDED.planned_start,
+                planned_end = EXCLUDED.planned_end,
+                actual_start = EXCLUDED.actual_start,
+                actual_end = EXCLUDED.actual_end,
+                planned_hours = EXCLUDED.planned_hours,
+                actual_hours = EXCLUDED.actual_hours,
+                delay_hours = EXCLUDED.delay_hours,
+                is_late = EXCLUDED.is_late,
+                total_workers = EXCLUDED.total_workers,
+                qty_issued = EXCLUDED.qty_issued,
+                qty_returned = EXCLUDED.qty_returned,
+                return_ratio = EXCLUDED.return_ratio,
+                diary_count = EXCLUDED.diary_count,
+                diary_days = EXCLUDED.diary_days,
+                work_days = EXCLUDED.work_days,
+                diary_coverage = EXCLUDED.diary_coverage
+            """,
+            task_filter=task_filter,
+            id_filter=id_filter,
+        ))
+        self.invalidate_model()
+        return True
+
+    @api.model
+    def _cron_refresh_open(self):
+        """Refresh the rows of started, unfinished workorders.
+
+        Their work days and diary coverage run up to today, so they age
+        without any write on the workorder.
+        """
+        self.flush_model(['actual_start', 'actual_end'])
+        self.env.cr.execute("""
+            SELECT task_id FROM workorder_kpi
+             WHERE actual_start IS NOT NULL AND actual_end IS NULL
+        """)
+        task_ids = [task_id for task_id, in self.env.cr.fetchall()]
+        self._refresh(task_ids)
+        return True
+
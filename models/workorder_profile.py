@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+import functools
+import random
+import time
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+# Days a profiling log row is kept
+PROFILE_RETENTION_DAYS = 30
+
+
+def profiled(key):
+    """Record timing and SQL cost of the decorated method when sampled.
+
+    ``key`` names the profiled action in the log. Whether a call is
+    sampled is decided by the ``eskon_workorder.profile_sample_rate``
+    system parameter (0 = off, 1 = every call).
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            Log = self.env['workorder.profile.log']
+            if not Log._is_sampled():
+                return method(self, *args, **kwargs)
+            return Log._profile(key, self, method, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class WorkorderProfileLog(models.Model):
+    _name = 'workorder.profile.log'
+    _description = 'Workorder Action Profiling Log'
+    _order = 'date desc, id desc'
+    _log_access = False
+
+    date = fields.Datetime(
+        string='Време',
+        required=True,
+        readonly=True,
+        index=True,
+        default=fields.Datetime.now
+    )
+
+    name = fields.Char(
+        string='Акција',
+        required=True,
+        readonly=True,
+        index=True
+    )
+
+    res_model = fields.Char(
+        string='Модел',
+        readonly=True
+    )
+
+    record_count = fields.Integer(
+        string='Број на записи',
+        readonly=True,
+        aggregator='avg'
+    )
+
+    user_id = fields.Many2one(
+        'res.users',
+        string='Корисник',
+        readonly=True,
+        ondelete='set null'
+    )
+
+    duration_ms = fields.Float(
+        string='Време (ms)',
+        readonly=True,
+        aggregator='avg'
+    )
+
+    query_count = fields.Integer(
+        string='SQL барања',
+        readonly=True,
+        aggregator='avg'
+    )
+
+    rows_read = fields.Integer(
+        string='Прочитани редови',
+        readonly=True,
+        aggregator='avg',
+        help='Редови прочитани со секвенцијално или индексно скенирање'
+    )
+
+    rows_written = fields.Integer(
+        string='Запишани редови',
+        readonly=True,
+        aggregator='avg',
+        help='Вметнати, изменети и избришани редови'
+    )
+
+    @api.model
+    def _is_sampled(self):
+        # Calls made from within a profiled call are part of its figures
+        if self.env.context.get('workorder_profiling'):
+            return False
+        rate = float(self.env['ir.config_parameter'].sudo().get_param(
+            'eskon_workorder.profile_sample_rate', 0.0))
+        return rate > 0 and random.random() < rate
+
+    @api.model
+    def _table_activity(self):
+        """Rows read and written so far by the current transaction"""
+        self.env.cr.execute("""
+            SELECT COALESCE(SUM(seq_tup_read + COALESCE(idx_tup_fetch, 0)), 0),
+                   COALESCE(SUM(n_tup_ins + n_tup_upd + n_tup_del), 0)
+              FROM pg_stat_xact_user_tables
+        """)
+        return self.env.cr.fetchone()
+
+    @api.model
+    def _profile(self, key, records, method, *args, **kwargs):
+        """Call ``method`` on ``records`` and log its cost under ``key``.
+
+        Pending writes are flushed before and after the call so that the
+        measured queries are the ones caused by the call itself. The probe
+        queries are left out of the query count.
+        """
+        cr = self.env.cr
+        self.env.flush_all()
+        rows_read, rows_written = self._table_activity()
+        queries = cr.sql_log_count
+        start = time.perf_counter()
+
+        result = method(records.with_context(workorder_profiling=True), *args, **kwargs)
+        self.env.flush_all()
+
+        duration = time.perf_counter() - start
+        query_count = cr.sql_log_count - queries
+        end_read, end_written = self._table_activity()
+        self.sudo().create({
+            'name': key,
+            'res_model': records._name,
+            'record_count': len(records),
+            'user_id': self.env.uid,
+            'duration_ms': duration * 1000.0,
+            'query_count': query_count,
+            'rows_read': end_read - rows_read,
+            'rows_written': end_written - rows_written,
+        })
+        return result
+
+    @api.autovacuum
+    def _gc_profile_logs(self):
+        limit = fields.Datetime.now() - timedelta(days=PROFILE_RETENTION_DAYS)
+        self.sudo().search([('date', '<', limit)]).unlink()
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from odoo import Command, api, models, _
+from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+
+# Workorder states whose diaries and equipment are kept on field devices
+SYNC_TASK_STATES = ('planned', 'in_progress', 'on_hold')
+
+# Diary fields a device may set; many2one values are ids
+SYNC_DIARY_FIELDS = (
+    'task_id', 'book_id', 'date', 'weather', 'temperature_min', 'temperature_max',
+    'shift1_start', 'shift1_end', 'shift2_start', 'shift2_end', 'shift3_start', 'shift3_end',
+    'shift_start', 'shift_end', 'electricity_meter', 'water_meter',
+    'contractor_notes', 'work_description', 'materials_used', 'equipment_used',
+    'safety_notes', 'incidents', 'incident_description',
+    'recorded_by_id', 'recorded_by_name', 'notes',
+)
+
+# Diary resource lines: payload key -> (line model, fields a device may set)
+SYNC_DIARY_LINES = {
+    'worker_line_ids': ('construction.diary.worker.line', ('sequence', 'qualification', 'count')),
+    'vehicle_line_ids': ('construction.diary.vehicle.line', ('sequence', 'vehicle_type', 'vehicle_id', 'count')),
+    'machine_line_ids': ('construction.diary.machine.line', ('sequence', 'machine_type', 'count')),
+}
+
+# Equipment line fields a device may set
+SYNC_EQUIPMENT_FIELDS = (
+    'task_id', 'product_id', 'sequence', 'qty_issued', 'qty_used', 'qty_returned', 'state',
+    'serial_number', 'notes', 'issue_date', 'return_date', 'issued_by_id', 'received_by_id',
+)
+
+# Records changed per model and call, unless set by eskon_workorder.sync_page_size
+SYNC_PAGE_SIZE = 500
+
+# Changes younger than this are held back to the next call, so that rows
+# of transactions still running when a page is read are not skipped.
+SYNC_LAG = timedelta(minutes=2)
+
+
+class WorkorderSync(models.AbstractModel):
+    _name = 'workorder.sync'
+    _description = 'Workorder Offline Sync'
+
+    @api.model
+    def _sync(self, diaries=(), equipment_lines=(), cursor=None):
+        """Apply a batch of device changes and return the server changes.
+
+        ``diaries`` are dicts with a client ``sync_key``, diary values and
+        optional ``worker_ids`` and resource line lists; a known key updates
+        its diary (drafts only) and replaces its lines. ``equipment_lines``
+        carry either a server ``id`` or a client ``sync_key``. Replaying a
+        payload is harmless.
+
+        Server changes are returned one page at a time in ``(write date,
+        id)`` order, starting after ``cursor`` (from the start when empty).
+        The device passes the returned cursor back and calls again while
+        ``more`` is set.
+        """
+        applied_diaries, skipped = self._sync_diaries(diaries)
+        applied_lines = self._sync_equipment_lines(equipment_lines)
+        changes, next_cursor, more = self._sync_changes(cursor or {})
+        return {
+            'cursor': next_cursor,
+            'more': more,
+            'applied': {
+                'diaries': applied_diaries,
+                'equipment_lines': applied_lines,
+            },
+            'skipped': {
+                'diaries': skipped,
+            },
+            'changes': changes,
+        }
+
+    @api.model
+    def _sync_values(self, payload, fnames):
+        """Keep the values of ``payload`` among the device-writable ``fnames``"""
+        return {fname: payload[fname] for fname in fnames if fname in payload}
+
+    @api.model
+    def _sync_keys(self, payloads):
+        keys = [payload.get('sync_key') for payload in payloads]
+        if not all(keys):
+            raise ValidationError(_('Секој запис за синхронизација мора да има клуч (sync_key)!'))
+        if len(set(keys)) != len(keys):
+            raise ValidationError(_('Клучевите за синхронизација мора да бидат единствени!'))
+        return keys
+
+    @api.model
+    def _sync_diaries(self, payloads):
+        """Create or update diaries by sync key, with bulk line replacement.
+
+        Returns the ``{sync_key: diary id}`` mapping of applied diaries and
+        the keys of diaries left untouched because they are no longer drafts.
+        """
+        if not payloads:
+            return {}, []
+        Diary = self.env['construction.diary']
+        keys = self._sync_keys(payloads)
+        existing = {
+            diary.sync_key: diary
+            for diary in Diary.search([('sync_key', 'in', keys)])
+        }
+
+        to_create, to_update, skipped = [], [], []
+        for payload in payloads:
+            diary = existing.get(payload['sync_key'])
+            if diary and diary.state != 'draft':
+                skipped.append(payload['sync_key'])
+                continue
+            vals = self._sync_values(payload, SYNC_DIARY_FIELDS)
+            if 'worker_ids' in payload:
+                vals['worker_ids'] = [Command.set(payload['worker_ids'] or [])]
+            if diary:
+                to_update.append((diary, vals, payload))
+            else:
+                vals['sync_key'] = payload['sync_key']
+                for key, (_model_name, fnames) in SYNC_DIARY_LINES.items():
+                    vals[key] = [
+                        Command.create(self._sync_values(line, fnames))
+                        for line in payload.get(key) or []
+                    ]
+                to_create.append(vals)
+
+        created = Diary.create(to_create)
+
+        for diary, vals, _payload in to_update:
+            if vals:
+                diary.write(vals)
+        for key, (model_name, fnames) in SYNC_DIARY_LINES.items():
+            replaced = [(diary, payload[key]) for diary, _vals, payload in to_update if key in payload]
+            if not replaced:
+                continue
+            Line = self.env[model_name]
+            Line.search([('diary_id', 'in', [diary.id for diary, _lines in replaced])]).unlink()
+            Line.create([
+                dict(self._sync_values(line, fnames), diary_id=diary.id)
+                for diary, lines in replaced
+                for line in lines or []
+            ])
+
+        applied = {diary.sync_key: diary.id for diary in created}
+        applied.update({diary.sync_key: diary.id for diary, _vals, _payload in to_update})
+        return applied, skipped
+
+    @api.model
+    def _sync_equipment_lines(self, payloads):
+        """Create or update equipment lines, grouping identical writes.
+
+        Lines are matched by server ``id`` or client ``sync_key``; unknown
+        keys are created in one batch. Returns ``{id or sync_key: line id}``.
+        """
+        if not payloads:
+            return {}
+        Line = self.env['workorder.equipment.line']
+        keys = self._sync_keys([payload for payload in payloads if not payload.get('id')])
+        by_key = {line.sync_key: line for line in Line.search([('sync_key', 'in', keys)])}
+        by_id = {
+            line.id: line
+            for line in Line.browse([payload['id'] for payload in payloads if payload.get('id')]).exists()
+        }
+
+        to_create = []
+        # Identical values are written once for all their lines
+        writes = {}
+        for payload in payloads:
+            vals = self._sync_values(payload, SYNC_EQUIPMENT_FIELDS)
+            line = by_id.get(payload['id']) if payload.get('id') else by_key.get(payload['sync_key'])
+            if line:
+                if vals:
+                    key = json.dumps(vals, sort_keys=True, default=str)
+                    writes.setdefault(key, (vals, []))[1].append(line.id)
+            elif payload.get('id'):
+                raise ValidationError(_('Ставката на опрема %s не постои!', payload['id']))
+            else:
+                to_create.append(dict(vals, sync_key=payload['sync_key']))
+
+        created = Line.create(to_create)
+        for vals, line_ids in writes.values():
+            Line.browse(line_ids).write(vals)
+
+        applied = {line.sync_key: line.id for line in created}
+        applied.update({line.sync_key: line.id for line in by_key.values()})
+        applied.update({str(line_id): line_id for line_id in by_id})
+        return applied
+
+    @api.model
+    def _sync_page_position(self, cursor, key):
+        """Return the ``(write date, id)`` position of ``cursor[key]``, if any.
+
+        Write dates keep their microseconds in the cursor; truncated to the
+        second, a page of rows written within one second would repeat.
+        """
+        position = cursor.get(key) if isinstance(cursor, dict) else None
+        if not position:
+            return None
+        write_date, record_id = position
+        return datetime.fromisoformat(write_date), int(record_id)
+
+    @api.model
+    def _sync_cursor_position(self, page):
+        changed, record_id = page[-1]
+        return [changed.isoformat(sep=' '), record_id]
+
+    @api.model
+    def _sync_changes(self, cursor):
+        """Return a page of changed diaries and equipment lines.
+
+        Only records of workorders still kept on devices are returned. A
+        diary counts as changed when it or one of its resource lines is
+        written. Returns ``(changes, next cursor, more)``.
+        """
+        page_size = int(self.env['ir.config_parameter'].sudo().get_param(
+            'eskon_workorder.sync_page_size', SYNC_PAGE_SIZE))
+        upper = self.env.cr.now() - SYNC_LAG
+        next_cursor = dict(cursor) if isinstance(cursor, dict) else {}
+
+        diary_page = self._sync_diary_page(self._sync_page_position(cursor, 'diaries'), upper, page_size)
+        if diary_page:
+            next_cursor['diaries'] = self._sync_cursor_position(diary_page)
+        diary_ids = [diary_id for _changed, diary_id in diary_page]
+
+        diary_fnames = list(SYNC_DIARY_FIELDS) + ['name', 'state', 'sync_key', 'worker_ids', 'write_date']
+        diaries_by_id = {
+            diary['id']: diary
+            for diary in self.env['construction.diary'].search_read(
+                [('id', 'in', diary_ids)], diary_fnames, load=None)
+        }
+        diaries = [diaries_by_id[diary_id] for diary_id in diary_ids if diary_id in diaries_by_id]
+        lines_by_diary = defaultdict(lambda: defaultdict(list))
+        for key, (model_name, fnames) in SYNC_DIARY_LINES.items():
+            for row in self.env[model_name].search_read(
+                    [('diary_id', 'in', diary_ids)], list(fnames) + ['diary_id'], load=None):
+                lines_by_diary[row.pop('diary_id')][key].append(row)
+        for diary in diaries:
+            for key in SYNC_DIARY_LINES:
+                diary[key] = lines_by_diary[diary['id']][key]
+
+        line_page = self._sync_equipment_line_page(
+            self._sync_page_position(cursor, 'equipment_lines'), upper, page_size)
+        if line_page:
+            next_cursor['equipment_lines'] = self._sync_cursor_position(line_page)
+        line_ids = [line_id for _changed, line_id in line_page]
+        line_fnames = list(SYNC_EQUIPMENT_FIELDS) + ['qty_remaining', 'sync_key', 'write_date']
+        lines_by_id = {
+            line['id']: line
+            for line in self.env['workorder.equipment.line'].search_read(
+                [('id', 'in', line_ids)], line_fnames, load=None)
+        }
+        equipment_lines = [lines_by_id[line_id] for line_id in line_ids if line_id in lines_by_id]
+
+        changes = {
+            'diaries': diaries,
+            'equipment_lines': equipment_lines,
+        }
+        more = len(diary_page) == page_size or len(line_page) == page_size
+        return changes, next_cursor, more
+
+    @api.model
+    def _sync_diary_page(self, position, upper, page_size):
+        """Return ``[(changed at, diary id)]`` of the next page of diaries.
+
+        The change date of a diary is the latest write date of the diary
+        and its resource lines; pages follow ``(changed at, id)`` order
+        after ``position``, up to ``upper``.
+        """
+        self.env['project.task'].flush_model(['workorder_state'])
+        self.env['construction.diary'].flush_model()
+        for model_name, _fnames in SYNC_DIARY_LINES.values():
+            self.env[model_name].flush_model()
+        after = SQL('TRUE') if not position else SQL("(c.changed, c.id) > (%s, %s)", *position)
+        self.env.cr.execute(SQL(
+            """
+            SELECT c.changed, c.id
+              FROM (SELECT d.id,
+                           GREATEST(d.write_date,
+                                    (SELECT MAX(write_date) FROM construction_diary_worker_line WHERE diary_id = d.id),
+                                    (SELECT MAX(write_date) FROM construction_diary_vehicle_line WHERE diary_id = d.id),
+                                    (SELECT MAX(write_date) FROM construction_diary_machine_line WHERE diary_id = d.id)
+                           ) AS changed
+                      FROM construction_diary d
+                      JOIN project_task t ON t.id = d.task_id
+                     WHERE t.workorder_state IN %(states)s) c
+             WHERE c.changed <= %(upper)s AND %(after)s
+          ORDER BY c.changed, c.id
+             LIMIT %(limit)s
+            """,
+            states=SYNC_TASK_STATES,
+            upper=upper,
+            after=after,
+            limit=page_size,
+        ))
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _sync_equipment_line_page(self, position, upper, page_size):
+        """Return ``[(write date, line id)]`` of the next page of equipment lines"""
+        self.env['project.task'].flush_model(['workorder_state'])
+        self.env['workorder.equipment.line'].flush_model()
+        after = SQL('TRUE') if not position else SQL("(l.write_date, l.id) > (%s, %s)", *position)
+        self.env.cr.execute(SQL(
+            """
+            SELECT l.write_date, l.id
+              FROM workorder_equipment_line l
+              JOIN project_task t ON t.id = l.task_id
+             WHERE t.workorder_state IN %(states)s
+               AND l.write_date <= %(upper)s AND %(after)s
+          ORDER BY l.write_date, l.id
+             LIMIT %(limit)s
+            """,
+            states=SYNC_TASK_STATES,
+            upper=upper,
+            after=after,
+            limit=page_size,
+        ))
+        return self.env.cr.fetchall()
+
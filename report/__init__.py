@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+from . import construction_book_entry_report
+from . import construction_diary_report
+from . import construction_book_quantity_report
+from . import fleet_vehicle_utilization_report
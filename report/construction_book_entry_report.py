@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+from odoo import api, models
+
+# Rows printed on one page of the book entry report
+ROWS_PER_PAGE = 29
+
+
+class ReportConstructionBookEntry(models.AbstractModel):
+    _name = 'report.eskon_workorder.report_construction_book_entry'
+    _description = 'Construction Book Entry Report'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        docs = self.env['construction.book.entry'].browse(docids)
+        lines = self.env['construction.book.entry.line'].search_read(
+            [('entry_id', 'in', docs.ids)],
+            ['entry_id', 'description', 'details', 'uom', 'quantity'],
+            order='entry_id, sequence, id',
+            load=None,
+        )
+        lines_by_entry = defaultdict(list)
+        for line in lines:
+            lines_by_entry[line['entry_id']].append(line)
+
+        return {
+            'doc_ids': docs.ids,
+            'doc_model': 'construction.book.entry',
+            'docs': docs,
+            'max_rows': ROWS_PER_PAGE,
+            'pages': {doc.id: self._paginate(lines_by_entry[doc.id]) for doc in docs},
+        }
+
+    @api.model
+    def _paginate(self, lines):
+        """Split ``lines`` into report pages of ``ROWS_PER_PAGE`` rows.
+
+        Every page carries its numbered lines, the numbers of the empty
+        filler rows, the total carried over from previous pages, its own
+        total and the running total.
+        """
+        pages = []
+        carried = 0.0
+        for start in range(0, max(len(lines), 1), ROWS_PER_PAGE):
+            page_lines = lines[start:start + ROWS_PER_PAGE]
+            page_total = sum(line['quantity'] for line in page_lines)
+            pages.append({
+                'lines': [
+                    dict(line, seq=start + index + 1)
+                    for index, line in enumerate(page_lines)
+                ],
+                'empty_rows': range(start + len(page_lines) + 1, start + ROWS_PER_PAGE + 1),
+                'carried': carried,
+                'page_total': page_total,
+                'total': carried + page_total,
+            })
+            carried += page_total
+        return pages
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models, tools
+from odoo.tools import SQL
+
+
+class ConstructionBookQuantityReport(models.Model):
+    _name = 'construction.book.quantity.report'
+    _description = 'Construction Book Bill of Quantities'
+    _auto = False
+    _order = 'book_id, description'
+
+    book_id = fields.Many2one('construction.book', string='Градежна книга', readonly=True)
+    product_id = fields.Many2one('product.product', string='Производ', readonly=True)
+    description = fields.Char(string='Изведена позиција', readonly=True)
+    uom = fields.Char(string='Единица мерка', readonly=True)
+    quantity = fields.Float(string='Количина', readonly=True)
+    line_count = fields.Integer(string='Број на ставки', readonly=True)
+    entry_count = fields.Integer(string='Број на страници', readonly=True)
+    first_period = fields.Date(string='Прв период', readonly=True)
+    last_period = fields.Date(string='Последен период', readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(SQL(
+            """
+            CREATE OR REPLACE VIEW %s AS (
+                SELECT MIN(l.id) AS id,
+                       e.book_id AS book_id,
+                       l.product_id AS product_id,
+                       l.description AS description,
+                       l.uom AS uom,
+                       SUM(l.quantity) AS quantity,
+                       COUNT(*) AS line_count,
+                       COUNT(DISTINCT l.entry_id) AS entry_count,
+                       MIN(e.period_start) AS first_period,
+                       MAX(e.period_end) AS last_period
+                  FROM construction_book_entry_line l
+                  JOIN construction_book_entry e ON e.id = l.entry_id
+              GROUP BY e.book_id, l.product_id, l.description, l.uom
+            )
+            """,
+            SQL.identifier(self._table),
+        ))
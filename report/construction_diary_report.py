@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+from itertools import zip_longest
+
+from odoo import api, models
+
+# Minimum number of resource rows printed on a diary page
+MIN_RESOURCE_ROWS = 3
+
+# (model, label field) of the worker, vehicle and machine resource columns
+RESOURCE_LINE_MODELS = (
+    ('construction.diary.worker.line', 'qualification'),
+    ('construction.diary.vehicle.line', 'vehicle_type'),
+    ('construction.diary.machine.line', 'machine_type'),
+)
+
+
+class ReportConstructionDiary(models.AbstractModel):
+    _name = 'report.eskon_workorder.report_construction_diary'
+    _description = 'Construction Diary Report'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        docs = self.env['construction.diary'].browse(docids)
+
+        # One bulk read per resource model, grouped by diary
+        columns = []
+        for model, label_field in RESOURCE_LINE_MODELS:
+            by_diary = defaultdict(list)
+            for line in self.env[model].search_read(
+                    [('diary_id', 'in', docs.ids)],
+                    ['diary_id', label_field, 'count'],
+                    order='diary_id, sequence, id',
+                    load=None):
+                by_diary[line['diary_id']].append((line[label_field], line['count']))
+            columns.append(by_diary)
+
+        resource_rows = {}
+        for doc in docs:
+            rows = list(zip_longest(*(column[doc.id] for column in columns), fillvalue=('', '')))
+            rows += [(('', ''),) * len(columns)] * (MIN_RESOURCE_ROWS - len(rows))
+            resource_rows[doc.id] = rows
+
+        return {
+            'doc_ids': docs.ids,
+            'doc_model': 'construction.diary',
+            'docs': docs,
+            'resource_rows': resource_rows,
+        }
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models, tools
+from odoo.tools import SQL
+
+# Workorder states whose vehicles count as used over the workorder's days
+USED_STATES = ('in_progress', 'on_hold', 'completed')
+
+
+class FleetVehicleUtilizationReport(models.Model):
+    _name = 'fleet.vehicle.utilization.report'
+    _description = 'Fleet Vehicle Utilization'
+    _auto = False
+    _order = 'date desc, vehicle_id'
+
+    vehicle_id = fields.Many2one('fleet.vehicle', string='Возило', readonly=True)
+    company_id = fields.Many2one('res.company', string='Компанија', readonly=True)
+    date = fields.Date(string='Ден', readonly=True)
+    is_used = fields.Boolean(string='Користено', readonly=True)
+    day_count = fields.Integer(string='Денови', readonly=True, aggregator='sum')
+    used_days = fields.Integer(string='Денови во употреба', readonly=True, aggregator='sum')
+    idle_days = fields.Integer(string='Неискористени денови', readonly=True, aggregator='sum')
+    utilization = fields.Float(
+        string='Искористеност (%)',
+        readonly=True,
+        aggregator='avg',
+        help='Удел на деновите во употреба во вкупните денови'
+    )
+    workorder_count = fields.Integer(
+        string='Работни налози',
+        readonly=True,
+        aggregator='sum',
+        help='Налози со возилото во денот; збирот по период е во налог-денови'
+    )
+    diary_count = fields.Integer(string='Дневнички записи', readonly=True, aggregator='sum')
+    diary_units = fields.Integer(
+        string='Ангажирани единици',
+        readonly=True,
+        aggregator='sum',
+        help='Збир на бројот на возила од ставките во дневникот'
+    )
+
+    def init(self):
+        # No pre-aggregated CTE: every vehicle-day looks its usage up in
+        # the base tables, so vehicle, company and date predicates from the
+        # UI prune vehicles and days before any usage is computed.
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(SQL(
+            """
+            CREATE OR REPLACE VIEW %(view)s AS (
+                SELECT v.id::bigint * 100000 + (c.day::date - DATE '1900-01-01') AS id,
+                       v.id AS vehicle_id,
+                       v.company_id,
+                       c.day::date AS date,
+                       u.row_count > 0 AS is_used,
+                       1 AS day_count,
+                       CASE WHEN u.row_count > 0 THEN 1 ELSE 0 END AS used_days,
+                       CASE WHEN u.row_count > 0 THEN 0 ELSE 1 END AS idle_days,
+                       CASE WHEN u.row_count > 0 THEN 100.0 ELSE 0.0 END AS utilization,
+                       u.workorder_count,
+                       u.diary_count,
+                       u.diary_units
+                  FROM fleet_vehicle v
+                 CROSS JOIN LATERAL (
+                       SELECT LEAST(
+                                  v.acquisition_date,
+                                  (SELECT MIN(d.date)
+                                     FROM construction_diary_vehicle_line l
+                                     JOIN construction_diary d ON d.id = l.diary_id
+                                    WHERE l.vehicle_id = v.id),
+                                  (SELECT MIN(COALESCE(t.actual_start, t.planned_start))::date
+                                     FROM project_task t
+                                    WHERE t.is_workorder AND t.workorder_state IN %(states)s
+                                      AND (t.primary_vehicle_id = v.id
+                                           OR t.id IN (SELECT r.task_id FROM project_task_vehicle_rel r
+                                                        WHERE r.vehicle_id = v.id)))
+                              ) AS first_day
+                       ) sp
+                 CROSS JOIN LATERAL generate_series(sp.first_day, CURRENT_DATE, INTERVAL '1 day') AS c(day)
+                 CROSS JOIN LATERAL (
+                       SELECT COUNT(*) AS row_count,
+                              COUNT(DISTINCT x.task_id) AS workorder_count,
+                              COUNT(DISTINCT x.diary_id) AS diary_count,
+                              COALESCE(SUM(x.units), 0) AS diary_units
+                         FROM (
+                               SELECT d.task_id, d.id AS diary_id, l.count AS units
+                                 FROM construction_diary_vehicle_line l
+                                 JOIN construction_diary d ON d.id = l.diary_id
+                                WHERE l.vehicle_id = v.id AND d.date = c.day::date
+                                UNION ALL
+                               SELECT t.id, NULL, 0
+                                 FROM project_task t
+                                WHERE t.is_workorder AND t.workorder_state IN %(states)s
+                                  AND (t.primary_vehicle_id = v.id
+                                       OR t.id IN (SELECT r.task_id FROM project_task_vehicle_rel r
+                                                    WHERE r.vehicle_id = v.id))
+                                  AND COALESCE(t.actual_start, t.planned_start)::date <= c.day::date
+                                  AND COALESCE(t.actual_end, t.planned_end,
+                                               t.actual_start, t.planned_start)::date >= c.day::date
+                              ) x
+                       ) u
+                 WHERE sp.first_day IS NOT NULL
+            )
+            """,
+            view=SQL.identifier(self._table),
+            states=USED_STATES,
+        ))
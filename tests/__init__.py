@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from . import test_performance_models
+from . import test_performance_stock
+from . import test_performance_reports
+from . import test_construction_book_entry_line_import
+from . import test_construction_book_export
+from . import test_construction_book_period_close
+from . import test_construction_book_quantity_report
+from . import test_construction_diary_daily
+from . import test_construction_diary_photo
+from . import test_construction_diary_timesheet
+from . import test_fleet_vehicle_utilization_report
+from . import test_ir_actions_report
+from . import test_workorder_conflict
+from . import test_workorder_equipment_custody
+from . import test_workorder_fulltext
+from . import test_workorder_geo
+from . import test_workorder_kpi
+from . import test_workorder_profile
+from . import test_workorder_stock
+from . import test_workorder_sync
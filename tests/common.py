@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+import io
+import math
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from reportlab.pdfgen import canvas
+
+from odoo import Command, fields
+from odoo.models import PREFETCH_MAX
+from odoo.tests import TransactionCase
+
+# Record counts compared by the scaling checks
+SMALL = 5
+LARGE = 50
+
+# Extra queries tolerated between the small and the large run; a path that
+# costs one query per record adds LARGE - SMALL queries and fails the check.
+QUERY_SLACK = 5
+
+
+def make_pdf(page_count):
+    """Return a blank PDF document of ``page_count`` pages"""
+    stream = io.BytesIO()
+    document = canvas.Canvas(stream)
+    for _page in range(page_count):
+        document.showPage()
+    document.save()
+    return stream.getvalue()
+
+
+class WorkorderCommon(TransactionCase):
+    """Fixtures and data builders shared by the module tests"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(
+            cls.env.context,
+            tracking_disable=True,
+            mail_create_nolog=True,
+            mail_create_nosubscribe=True,
+            mail_notrack=True,
+        ))
+        cls.today = fields.Date.context_today(cls.env['construction.diary'])
+        cls.planned_start = datetime.combine(cls.today, datetime.min.time()) + timedelta(hours=7)
+        cls.planned_end = cls.planned_start + timedelta(hours=9)
+
+        cls.project = cls.env['project.project'].create({'name': 'Градилиште Тест'})
+        cls.employees = cls.env['hr.employee'].create([
+            {'name': f'Работник {index}'} for index in range(5)
+        ])
+        brand = cls.env['fleet.vehicle.model.brand'].create({'name': 'Тест'})
+        vehicle_model = cls.env['fleet.vehicle.model'].create({'name': 'Камион', 'brand_id': brand.id})
+        cls.vehicle = cls.env['fleet.vehicle'].create({
+            'model_id': vehicle_model.id,
+            'license_plate': 'SK-1000-AA',
+        })
+        cls.products = cls.env['product.product'].create([{
+            'name': f'Материјал {index}',
+            'default_code': f'MAT{index:03d}',
+            'type': 'consu',
+        } for index in range(10)])
+        cls.book = cls._create_books(1)
+
+    # === Data builders ===
+    @classmethod
+    def _create_books(cls, count):
+        return cls.env['construction.book'].create([{
+            'construction_name': f'Објект {index}',
+            'construction_address': f'ул. Тестова {index}, Скопје',
+            'investor_name': 'Инвеститор ДООЕЛ',
+            'contractor_company': 'Ескон ДОО',
+        } for index in range(count)])
+
+    @classmethod
+    def _create_workorders(cls, count, lines_per_task=0, line_state='draft'):
+        tasks = cls.env['project.task'].create([{
+            'name': f'РН {index:05d}',
+            'project_id': cls.project.id,
+            'is_workorder': True,
+            'workorder_state': 'in_progress',
+            'planned_start': cls.planned_start,
+            'planned_end': cls.planned_end,
+            'work_location': f'Локација {index}',
+            'worker_ids': [Command.set(cls.employees.ids)],
+            'primary_vehicle_id': cls.vehicle.id,
+        } for index in range(count)])
+        if lines_per_task:
+            cls.env['workorder.equipment.line'].create([{
+                'task_id': task.id,
+                'product_id': cls.products[index % len(cls.products)].id,
+                'qty_issued': 4.0,
+                'state': line_state,
+            } for task in tasks for index in range(lines_per_task)])
+        return tasks
+
+    @classmethod
+    def _diary_vals_list(cls, tasks, count, book=None):
+        return [{
+            'task_id': tasks[index % len(tasks)].id,
+            'book_id': book.id if book else False,
+            'date': cls.today - timedelta(days=index % 365),
+            'contractor_notes': '<p>Изведени ископи и армирање</p>',
+            'worker_ids': [Command.set(cls.employees.ids)],
+            'worker_line_ids': [
+                Command.create({'qualification': 'ВКВ', 'count': 3}),
+                Command.create({'qualification': 'КВ', 'count': 2}),
+            ],
+            'vehicle_line_ids': [
+                Command.create({'vehicle_type': 'Камион', 'vehicle_id': cls.vehicle.id, 'count': 1}),
+            ],
+            'machine_line_ids': [
+                Command.create({'machine_type': 'Багер', 'count': 1}),
+            ],
+        } for index in range(count)]
+
+    @classmethod
+    def _create_diaries(cls, tasks, count, book=None):
+        return cls.env['construction.diary'].create(cls._diary_vals_list(tasks, count, book))
+
+    @classmethod
+    def _entry_vals_list(cls, book, count, lines_per_entry=29):
+        return [{
+            'book_id': book.id,
+            'page_number': index + 1,
+            'period_start': cls.today.replace(day=1),
+            'period_end': cls.today,
+            'line_ids': [Command.create({
+                'location': 'Кат 1',
+                'description': f'Позиција {line}',
+                'uom': 'м2',
+                'quantity': 1.5,
+            }) for line in range(lines_per_entry)],
+        } for index in range(count)]
+
+    @classmethod
+    def _create_entries(cls, book, count, lines_per_entry=29):
+        return cls.env['construction.book.entry'].create(cls._entry_vals_list(book, count, lines_per_entry))
+
+
+class WorkorderPerformanceCommon(WorkorderCommon):
+    """Budget helpers for the performance tests"""
+
+    def measure_queries(self, func):
+        """Run ``func`` on a cold cache and return its query count and result"""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        start = self.env.cr.sql_log_count
+        result = func()
+        self.env.flush_all()
+        return self.env.cr.sql_log_count - start, result
+
+    def count_queries(self, func):
+        """Run ``func`` on a cold cache and return the queries it executed"""
+        return self.measure_queries(func)[0]
+
+    def assertQueriesIndependentOfSize(self, run, slack=QUERY_SLACK):
+        """Check that ``run(size)`` costs the same for SMALL and LARGE sizes.
+
+        ``run`` prepares its own records of the given size and returns a
+        callable performing the measured operation on them.
+        """
+        small = self.count_queries(run(SMALL))
+        large = self.count_queries(run(LARGE))
+        self.assertLessEqual(
+            large, small + slack,
+            f'{large} queries for {LARGE} records against {small} for {SMALL}: '
+            f'the operation issues queries per record',
+        )
+
+    def assertBulkQueries(self, run, size, slack=QUERY_SLACK):
+        """Run ``run(size)`` within the query count recorded for SMALL records.
+
+        The ceiling is the count measured for SMALL records once per
+        prefetch chunk of ``size``, plus ``slack``: batching by chunks
+        passes, a query per record does not. Returns the result of the
+        measured callable.
+        """
+        recorded = self.count_queries(run(SMALL))
+        ceiling = recorded * math.ceil(size / PREFETCH_MAX) + slack
+        count, result = self.measure_queries(run(size))
+        self.assertLessEqual(
+            count, ceiling,
+            f'{count} queries for {size} records, {recorded} recorded for {SMALL}',
+        )
+        return result
+
+    def recompute(self, records, *fnames):
+        """Mark ``fnames`` to recompute on ``records`` and flush them"""
+        for fname in fnames:
+            self.env.add_to_compute(records._fields[fname], records)
+        records.flush_recordset(list(fnames))
+
+    @contextmanager
+    def assertTimeBudget(self, seconds):
+        """Fail when the block runs longer than ``seconds``"""
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        self.assertLessEqual(elapsed, seconds, f'took {elapsed:.2f}s, budget is {seconds}s')
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import base64
+import io
+from unittest.mock import patch
+
+import openpyxl
+
+from odoo.tests import tagged
+
+from odoo.addons.eskon_workorder.wizard import construction_book_entry_line_import
+
+from .common import WorkorderCommon
+
+
+@tagged('post_install', '-at_install')
+class TestConstructionBookEntryLineImport(WorkorderCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.entry = cls._create_entries(cls.book, 1, lines_per_entry=0)
+        cls.env['product.product'].create([
+            {'name': 'Двоен', 'type': 'consu'},
+            {'name': 'Двоен', 'type': 'consu'},
+        ])
+
+    def _import(self, content, filename):
+        wizard = self.env['construction.book.entry.line.import'].create({
+            'entry_id': self.entry.id,
+            'file': base64.b64encode(content),
+            'filename': filename,
+        })
+        return wizard, wizard.action_import()
+
+    def test_csv_errors_block_the_import(self):
+        content = (
+            'Количина;Шифра;Изведена позиција;ЕМ\n'
+            '2,5;MAT001;;\n'
+            '1 234,5;Материјал 2;;\n'
+            '3;Двоен;;\n'
+            '4;;Ископ;м3\n'
+            '5;XYZ;;\n'
+        ).encode()
+        wizard, action = self._import(content, 'pozicii.csv')
+        self.assertEqual(action['res_id'], wizard.id)
+        self.assertFalse(self.entry.line_ids, 'no row is written while any row is invalid')
+        self.assertEqual(wizard.error_report, (
+            'Ред 4: производот „Двоен“ не е еднозначен\n'
+            'Ред 6: непознат производ „XYZ“'
+        ))
+
+    def test_xlsx_errors_block_the_import(self):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['Количина', 'Изведена позиција', 'ЕМ'])
+        sheet.append([2.5, 'Ископ', 'м3'])
+        sheet.append(['abc', 'Армирање', 'кг'])
+        sheet.append([1, None, 'м2'])
+        data = io.BytesIO()
+        workbook.save(data)
+
+        wizard, _action = self._import(data.getvalue(), 'pozicii.xlsx')
+        self.assertFalse(self.entry.line_ids)
+        self.assertEqual(wizard.error_report, (
+            'Ред 3: неважечка количина „abc“\n'
+            'Ред 4: недостасува опис или производ'
+        ))
+
+    def test_csv_import_in_batches(self):
+        content = (
+            'quantity,product,description,uom\n'
+            '1.5,MAT001,,\n'
+            '"1,25",Материјал 2,,\n'
+            '2,,Армирање,кг\n'
+        ).encode()
+        with patch.object(construction_book_entry_line_import, 'IMPORT_BATCH_SIZE', 2):
+            _wizard, action = self._import(content, 'pozicii.csv')
+        self.assertEqual(action, {'type': 'ir.actions.act_window_close'})
+        lines = self.entry.line_ids
+        self.assertEqual(lines.mapped('product_id'), self.products[1:3])
+        self.assertEqual(lines.mapped('description'), ['Материјал 1', 'Материјал 2', 'Армирање'])
+        self.assertEqual(lines.mapped('quantity'), [1.5, 1.25, 2.0])
+        self.assertEqual(lines.mapped('sequence'), [10, 20, 30])
+        self.assertEqual(lines[2].uom, 'кг')
+
+    def test_parse_quantity(self):
+        Import = self.env['construction.book.entry.line.import']
+        self.assertEqual(Import._parse_quantity('1 234,5'), 1234.5)
+        self.assertEqual(Import._parse_quantity('0.75'), 0.75)
+        self.assertEqual(Import._parse_quantity(3), 3.0)
+        with self.assertRaises(ValueError):
+            Import._parse_quantity('')
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import io
+from unittest.mock import patch
+
+import openpyxl
+
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+from odoo.tools.pdf import PdfFileReader
+
+from .common import WorkorderCommon, make_pdf
+
+
+@tagged('post_install', '-at_install')
+class TestConstructionBookExport(WorkorderCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.entries = cls._create_entries(cls.book, 3, lines_per_entry=3)
+        cls.diaries = cls._create_diaries(cls._create_workorders(1), 5, cls.book)
+
+    def test_full_pdf_export(self):
+        self.env['ir.config_parameter'].sudo().set_param('eskon_workorder.book_pdf_chunk_size', 2)
+        renders = []
+
+        def render_pdf(report, report_ref, res_ids=None, data=None):
+            renders.append((report_ref, list(res_ids)))
+            return make_pdf(len(res_ids)), 'pdf'
+
+        with patch.object(self.registry['ir.actions.report'], '_render_qweb_pdf', render_pdf):
+            attachment = self.book._export_full_pdf()
+
+        entry_ids = self.entries.sorted('page_number').ids
+        diary_ids = self.diaries.sorted(lambda diary: (diary.date, diary.id)).ids
+        self.assertEqual(renders, [
+            ('eskon_workorder.report_construction_book', self.book.ids),
+            ('eskon_workorder.report_construction_book_entry', entry_ids[:2]),
+            ('eskon_workorder.report_construction_book_entry', entry_ids[2:]),
+            ('eskon_workorder.report_construction_diary', diary_ids[:2]),
+            ('eskon_workorder.report_construction_diary', diary_ids[2:4]),
+            ('eskon_workorder.report_construction_diary', diary_ids[4:]),
+        ])
+
+        self.assertEqual((attachment.res_model, attachment.res_id), (self.book._name, self.book.id))
+        self.assertEqual(attachment.mimetype, 'application/pdf')
+        content = attachment.raw
+        self.assertEqual(attachment.file_size, len(content))
+        self.assertEqual(attachment.checksum, hashlib.sha1(content).hexdigest())
+        self.assertEqual(PdfFileReader(io.BytesIO(content)).getNumPages(), 1 + 3 + 5)
+
+    def _read_xlsx(self, attachment):
+        workbook = openpyxl.load_workbook(io.BytesIO(attachment.raw), read_only=True)
+        return {sheet.title: list(sheet.iter_rows(values_only=True)) for sheet in workbook.worksheets}
+
+    def test_xlsx_export(self):
+        # Chunks of two rows split the pages, so paging must resume mid-page
+        self.env['ir.config_parameter'].sudo().set_param('eskon_workorder.book_xlsx_chunk_size', 2)
+        self.entries[1].line_ids[0].product_id = self.products[0]
+        sheets = self._read_xlsx(self.book._export_xlsx())
+        self.assertEqual(list(sheets), ['Книга', 'Позиции'])
+        self.assertEqual(sheets['Книга'][0][1], self.book.name)
+
+        header, *rows = sheets['Позиции']
+        self.assertEqual(header[:4], ('Страна бр.', 'Период од', 'Период до', '№ п/п'))
+        self.assertEqual([row[0] for row in rows], [1, 1, 1, 2, 2, 2, 3, 3, 3])
+        self.assertEqual([row[5] for row in rows[:3]], ['Позиција 0', 'Позиција 1', 'Позиција 2'])
+        self.assertEqual(rows[3][6:8], ('MAT000', 'Материјал 0'))
+        self.assertEqual(sum(row[9] for row in rows), 9 * 1.5)
+
+    def test_xlsx_export_per_entry(self):
+        self.env['ir.config_parameter'].sudo().set_param('eskon_workorder.book_xlsx_chunk_size', 2)
+        sheets = self._read_xlsx(self.book._export_xlsx(per_entry=True))
+        self.assertEqual(list(sheets), ['Книга', 'Страна 1', 'Страна 2', 'Страна 3'])
+        period, _blank, header, *rows = sheets['Страна 2']
+        self.assertEqual(period[0], 'Период')
+        self.assertEqual(header[0], '№ п/п')
+        self.assertEqual([row[2] for row in rows], ['Позиција 0', 'Позиција 1', 'Позиција 2'])
+
+        self.env['ir.config_parameter'].sudo().set_param('eskon_workorder.book_xlsx_max_sheets', 2)
+        with self.assertRaises(UserError):
+            self.book._export_xlsx(per_entry=True)
+        self.assertTrue(self.book._export_xlsx(), 'the single-sheet export is not capped')
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, time, timedelta
+
+from odoo.exceptions import ValidationError
+from odoo.tests import tagged
+
+from .common import WorkorderCommon
+
+
+@tagged('post_install', '-at_install')
+class TestConstructionBookPeriodClose(WorkorderCommon):
+
+    def test_period_close_splits_consumption_by_book(self):
+        task = self._create_workorders(1)
+        book_a, book_b = self._create_books(2)
+        yesterday = self.today - timedelta(days=1)
+        diaries = self._create_diaries(task, 2)
+        diaries[0].book_id = book_a
+        diaries[1].book_id = book_b
+        diaries.write({'state': 'approved'})
+        product = self.products[0]
+        self.env['workorder.equipment.custody']._record([{
+            'event_type': 'consume',
+            'task_id': task.id,
+            'product_id': product.id,
+            'quantity': quantity,
+            'date': datetime.combine(day, time(10)),
+        } for day, quantity in ((self.today, 2.0), (yesterday, 3.0))])
+
+        Close = self.env['construction.book.period.close']
+        entries = Close.create({
+            'book_ids': [(6, 0, (book_a | book_b).ids)],
+            'period_start': yesterday,
+            'period_end': self.today,
+        })._create_entries()
+        consumed = {
+            line.entry_id.book_id: line.quantity
+            for line in entries.line_ids if line.product_id == product
+        }
+        self.assertEqual(consumed, {book_a: 2.0, book_b: 3.0})
+
+        overlapping = Close.create({
+            'book_ids': [(6, 0, book_a.ids)],
+            'period_start': self.today,
+            'period_end': self.today + timedelta(days=30),
+        })
+        with self.assertRaises(ValidationError):
+            overlapping._create_entries()
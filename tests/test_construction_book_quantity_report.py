@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from odoo import Command
+from odoo.tests import tagged
+
+from .common import WorkorderCommon
+
+
+@tagged('post_install', '-at_install')
+class TestConstructionBookQuantityReport(WorkorderCommon):
+
+    def test_quantities_per_book(self):
+        entries = self._create_entries(self.book, 2, lines_per_entry=2)
+        entries[1].line_ids = [Command.create({
+            'description': 'Позиција 0',
+            'uom': 'м2',
+            'quantity': 4.0,
+            'product_id': self.products[0].id,
+        })]
+        other_book = self._create_books(1)
+        self._create_entries(other_book, 1, lines_per_entry=1)
+        self.env.flush_all()
+
+        rows = sorted(self.env['construction.book.quantity.report'].search_read(
+            [('book_id', '=', self.book.id)],
+            ['product_id', 'description', 'uom', 'quantity', 'line_count', 'entry_count',
+             'first_period', 'last_period'],
+            load=None,
+        ), key=lambda row: (row['description'], row['product_id'] or 0))
+        self.assertEqual(
+            [(row['description'], row['product_id'], row['quantity'], row['line_count'], row['entry_count'])
+             for row in rows],
+            [
+                ('Позиција 0', False, 3.0, 2, 2),
+                ('Позиција 0', self.products[0].id, 4.0, 1, 1),
+                ('Позиција 1', False, 3.0, 2, 2),
+            ],
+        )
+        self.assertEqual((rows[0]['first_period'], rows[0]['last_period']),
+                         (self.today.replace(day=1), self.today))
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import Command
+from odoo.tests import tagged
+
+from .common import WorkorderCommon
+
+
+@tagged('post_install', '-at_install')
+class TestConstructionDiaryDaily(WorkorderCommon):
+
+    def test_prepare_daily_diaries(self):
+        continued, started, closed = self._create_workorders(3)
+        closed.workorder_state = 'completed'
+        previous = self._create_diaries(continued, 1)
+        previous.write({
+            'date': self.today - timedelta(days=1),
+            'shift2_start': 16.0,
+            'shift2_end': 22.0,
+            'worker_ids': [Command.set(self.employees[:2].ids)],
+        })
+        self.book.task_ids = [Command.link(started.id)]
+        self.book.action_activate()
+        started.worker_ids = [Command.set(self.employees[3:].ids)]
+
+        Diary = self.env['construction.diary']
+        Diary._cron_prepare_daily_diaries()
+        Diary._cron_prepare_daily_diaries()
+        diaries = Diary.search([('date', '=', self.today), ('task_id', 'in', (continued | started | closed).ids)])
+        self.assertEqual(diaries.task_id, continued | started, 'one diary per workorder in progress, once')
+
+        carried = diaries.filtered(lambda diary: diary.task_id == continued)
+        self.assertEqual(carried.state, 'draft')
+        self.assertEqual((carried.shift2_start, carried.shift2_end, carried.total_work_hours), (16.0, 22.0, 14.0))
+        self.assertEqual(carried.worker_ids, self.employees[:2])
+        self.assertEqual(carried.worker_line_ids.mapped('qualification'), ['ВКВ', 'КВ'])
+        self.assertEqual(carried.vehicle_line_ids.vehicle_id, self.vehicle)
+
+        fresh = diaries - carried
+        self.assertEqual(fresh.book_id, self.book)
+        self.assertEqual(fresh.construction_name, self.book.construction_name)
+        self.assertEqual(fresh.worker_ids, self.employees[3:])
+        self.assertFalse(fresh.worker_line_ids)
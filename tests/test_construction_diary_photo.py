@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from odoo import Command
+from odoo.tests import tagged
+
+from .common import WorkorderCommon
+
+
+@tagged('post_install', '-at_install')
+class TestConstructionDiaryPhoto(WorkorderCommon):
+
+    def test_undecodable_photo_is_kept(self):
+        task = self._create_workorders(1)
+        upload = self.env['ir.attachment'].create({
+            'name': 'IMG_0001.heic',
+            'raw': b'\x00\x00\x00\x18ftypheic not decodable',
+            'mimetype': 'image/heic',
+        })
+        diary = self._create_diaries(task, 1)
+        diary.photo_ids = [Command.link(upload.id)]
+        self.assertEqual(diary.photo_ids, upload)
+        self.assertFalse(diary.photo_image_ids)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import new_test_user, tagged
+
+from .common import SMALL, WorkorderCommon
+
+
+@tagged('post_install', '-at_install')
+class TestConstructionDiaryTimesheet(WorkorderCommon):
+
+    def _approved_diaries(self, tasks, count):
+        diaries = self._create_diaries(tasks, count)
+        diaries.write({'state': 'approved'})
+        return diaries
+
+    def test_timesheet_generation(self):
+        tasks = self._create_workorders(SMALL)
+        diaries = self._approved_diaries(tasks, 30)
+        timesheets = diaries._generate_timesheets()
+        self.assertEqual(len(timesheets), 30 * len(self.employees))
+        self.assertEqual(sum(timesheets.mapped('unit_amount')), 30 * len(self.employees) * 8.0)
+        self.assertEqual(timesheets.task_id, tasks)
+        self.assertFalse(diaries._generate_timesheets())
+
+        diaries[0].action_reset_to_draft()
+        self.assertFalse(diaries[0].timesheet_ids)
+        diaries[0].action_approve()
+        self.assertEqual(len(diaries._generate_timesheets()), len(self.employees))
+
+    def test_reset_by_non_approver(self):
+        diary = self._approved_diaries(self._create_workorders(1), 1)
+        self.assertEqual(len(diary._generate_timesheets()), len(self.employees))
+        user = new_test_user(
+            self.env, login='diary_user',
+            groups='project.group_project_user,hr_timesheet.group_hr_timesheet_user',
+        )
+        diary.with_user(user).action_reset_to_draft()
+        self.assertEqual(diary.state, 'draft')
+        self.assertFalse(diary.timesheet_ids)
+
+    def test_timesheet_hours_per_shift(self):
+        task = self._create_workorders(1)
+        diary = self._create_diaries(task, 1)
+        diary.write({
+            'shift1_start': 6.0, 'shift1_end': 14.0,
+            'shift2_start': 14.0, 'shift2_end': 20.0,
+            'state': 'approved',
+        })
+        self.assertEqual(diary.total_work_hours, 14.0)
+        timesheets = diary._generate_timesheets()
+        # Five workers over two shifts: the first three work the 8h shift,
+        # the last two the 6h one; nobody books the 14h site day.
+        hours = {line.employee_id: line.unit_amount for line in timesheets}
+        self.assertEqual([hours[employee] for employee in diary.worker_ids], [8.0, 8.0, 8.0, 6.0, 6.0])
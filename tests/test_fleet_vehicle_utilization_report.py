@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo.tests import tagged
+
+from .common import WorkorderCommon
+
+
+@tagged('post_install', '-at_install')
+class TestFleetVehicleUtilizationReport(WorkorderCommon):
+
+    def _utilization(self, domain=()):
+        self.env.flush_all()
+        return self.env['fleet.vehicle.utilization.report']._read_group(
+            [('vehicle_id', '=', self.vehicle.id), *domain], [],
+            ['day_count:sum', 'used_days:sum', 'idle_days:sum',
+             'workorder_count:sum', 'diary_count:sum', 'diary_units:sum'],
+        )[0]
+
+    def test_vehicle_utilization(self):
+        self.vehicle.acquisition_date = self.today - timedelta(days=9)
+        tasks = self._create_workorders(2)
+        self._create_diaries(tasks, 3)
+        # Today both workorders hold the vehicle; diaries cover the two
+        # previous days with one workorder each.
+        self.assertEqual(self._utilization(), (10, 3, 7, 4, 3, 3))
+        # Date predicates restrict the vehicle-days before usage is looked up
+        self.assertEqual(self._utilization([('date', '=', self.today)]), (1, 1, 0, 2, 1, 1))
+        self.assertEqual(
+            self._utilization([('date', '<', self.today - timedelta(days=2))]), (7, 0, 7, 0, 0, 0))
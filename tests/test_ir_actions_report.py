@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from odoo.tests import tagged
+
+from .common import WorkorderCommon, make_pdf
+
+
+@tagged('post_install', '-at_install')
+class TestIrActionsReport(WorkorderCommon):
+
+    def _render(self, report_ref, records):
+        """Return the PDF of ``records`` and the documents sent to wkhtmltopdf"""
+        rendered = []
+
+        def run_wkhtmltopdf(report, bodies, *args, **kwargs):
+            rendered.extend(bodies)
+            return make_pdf(len(bodies))
+
+        with patch.object(self.registry['ir.actions.report'], '_run_wkhtmltopdf', run_wkhtmltopdf):
+            content, _report_type = self.env['ir.actions.report'].with_context(
+                force_report_rendering=True,
+            )._render_qweb_pdf(report_ref, records.ids)
+        return content, len(rendered)
+
+    def _cached_pdfs(self, record):
+        return self.env['ir.attachment'].search([
+            ('res_model', '=', record._name),
+            ('res_id', '=', record.id),
+            ('mimetype', '=', 'application/pdf'),
+        ])
+
+    def test_signed_entry_pdf_is_cached(self):
+        report_ref = 'eskon_workorder.report_construction_book_entry'
+        entry = self._create_entries(self.book, 1, lines_per_entry=2)
+        self._render(report_ref, entry)
+        self.assertFalse(self._cached_pdfs(entry), 'unsigned pages may still change')
+
+        entry.write({'contractor_signatory': 'Изведувач', 'supervisor_signatory': 'Надзор'})
+        entry.action_sign()
+        content, rendered = self._render(report_ref, entry)
+        self.assertEqual(rendered, 1)
+        cached = self._cached_pdfs(entry)
+        self.assertEqual(cached.name, '%s (%s).pdf' % (entry.name, entry.write_date.strftime('%Y%m%d%H%M%S')))
+        self.assertEqual(cached.raw, content)
+
+        content, rendered = self._render(report_ref, entry)
+        self.assertEqual(rendered, 0, 'the signed page is served from its attachment')
+        self.assertEqual(content, cached.raw)
+        self.assertEqual(self._cached_pdfs(entry), cached)
+
+        entry.action_reset_draft()
+        self.assertFalse(cached.exists())
+
+    def test_approved_diary_pdf_is_cached(self):
+        report_ref = 'eskon_workorder.report_construction_diary'
+        diary = self._create_diaries(self._create_workorders(1), 1)
+        diary.write({'state': 'approved'})
+        self._render(report_ref, diary)
+        cached = self._cached_pdfs(diary)
+        self.assertEqual(len(cached), 1)
+        self.assertEqual(self._render(report_ref, diary)[1], 0)
+
+        diary.action_reset_to_draft()
+        self.assertFalse(cached.exists())
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+import json
+
+from odoo.tests import tagged
+from odoo.tools import SQL
+
+from .common import LARGE, SMALL, WorkorderPerformanceCommon
+
+# Rows cloned into a table before its plans are checked
+VOLUME = 100000
+
+
+@tagged('post_install', '-at_install')
+class TestPerformanceModels(WorkorderPerformanceCommon):
+
+    # === create ===
+    def test_diary_create_scaling(self):
+        tasks = self._create_workorders(SMALL)
+
+        def run(size):
+            vals_list = self._diary_vals_list(tasks, size, self.book)
+            return lambda: self.env['construction.diary'].create(vals_list)
+
+        self.assertQueriesIndependentOfSize(run)
+
+    def test_diary_create_bulk(self):
+        tasks = self._create_workorders(LARGE)
+
+        def run(size):
+            vals_list = self._diary_vals_list(tasks, size, self.book)
+            return lambda: self.env['construction.diary'].create(vals_list)
+
+        with self.assertTimeBudget(120):
+            diaries = self.assertBulkQueries(run, 5000)
+        self.assertEqual(len(diaries), 5000)
+        self.assertEqual(diaries[0].total_workers_from_lines, 5)
+
+    def test_book_create_scaling(self):
+        def run(size):
+            return lambda: self._create_books(size)
+
+        self.assertQueriesIndependentOfSize(run)
+
+    def test_book_entry_create_scaling(self):
+        def run(size):
+            vals_list = self._entry_vals_list(self.book, size)
+            return lambda: self.env['construction.book.entry'].create(vals_list)
+
+        self.assertQueriesIndependentOfSize(run)
+
+    def test_workorder_create_scaling(self):
+        def run(size):
+            return lambda: self._create_workorders(size, lines_per_task=5)
+
+        self.assertQueriesIndependentOfSize(run)
+
+    def test_kpi_refresh_write_scaling(self):
+        # Each write refreshes the KPI rows of its workorders in one upsert
+        def run(size):
+            tasks = self._create_workorders(size, lines_per_task=2, line_state='issued')
+            diaries = self._create_diaries(tasks, size)
+
+            def write_all():
+                tasks.write({'workorder_state': 'on_hold'})
+                tasks.equipment_line_ids.write({'qty_returned': 1.0})
+                diaries.write({'date': self.today})
+            return write_all
+
+        self.assertQueriesIndependentOfSize(run)
+
+    # === stored computes ===
+    def test_compute_shift_hours_scaling(self):
+        tasks = self._create_workorders(SMALL)
+
+        def run(size):
+            diaries = self._create_diaries(tasks, size)
+            return lambda: self.recompute(
+                diaries, 'shift1_hours', 'shift2_hours', 'shift3_hours', 'total_work_hours')
+
+        self.assertQueriesIndependentOfSize(run)
+
+    def test_compute_totals_scaling(self):
+        def run(size):
+            entries = self._create_entries(self.book, size)
+            return lambda: self.recompute(entries, 'line_count', 'total_quantity')
+
+        self.assertQueriesIndependentOfSize(run)
+
+    def test_compute_equipment_stats_scaling(self):
+        def run(size):
+            tasks = self._create_workorders(size, lines_per_task=10, line_state='issued')
+            return lambda: self.recompute(tasks, 'total_equipment_lines', 'equipment_all_returned')
+
+        self.assertQueriesIndependentOfSize(run)
+
+    def test_counter_computes_scaling(self):
+        def run_books(size):
+            books = self._create_books(size)
+            tasks = self._create_workorders(1)
+            for book in books:
+                self._create_diaries(tasks, 3, book)
+                self._create_entries(book, 2, lines_per_entry=1)
+            return lambda: self.recompute(books, 'diary_count', 'entry_count')
+
+        def run_tasks(size):
+            tasks = self._create_workorders(size, lines_per_task=3)
+            self._create_diaries(tasks, size * 3)
+            return lambda: self.recompute(tasks, 'total_workers', 'diary_count')
+
+        self.assertQueriesIndependentOfSize(run_books)
+        self.assertQueriesIndependentOfSize(run_tasks)
+
+    def test_counter_values(self):
+        tasks = self._create_workorders(2, lines_per_task=3, line_state='issued')
+        self._create_diaries(tasks, 4, self.book)
+        self._create_entries(self.book, 3, lines_per_entry=2)
+        self.env.invalidate_all()
+        self.assertEqual(self.book.diary_count, 4)
+        self.assertEqual(self.book.entry_count, 3)
+        self.assertEqual(tasks.mapped('total_workers'), [5, 5])
+        self.assertEqual(tasks.mapped('diary_count'), [2, 2])
+        self.assertEqual(tasks.mapped('total_equipment_lines'), [3, 3])
+        self.assertFalse(any(tasks.mapped('equipment_all_returned')))
+
+    # === indexes ===
+    def _populate(self, table, template_id, **overrides):
+        """Clone the template row VOLUME times and refresh the statistics
+
+        ``overrides`` maps columns to SQL expressions over the series
+        value ``g``, so the clones spread over other parents and values.
+        """
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            """SELECT column_name FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = %s AND column_name != 'id'""",
+            table,
+        ))
+        columns = [column for column, in self.env.cr.fetchall()]
+        self.env.cr.execute(SQL(
+            "INSERT INTO %s (%s) SELECT %s FROM %s t CROSS JOIN generate_series(1, %s) g WHERE t.id = %s",
+            SQL.identifier(table),
+            SQL(', ').join(SQL.identifier(column) for column in columns),
+            SQL(', ').join(overrides.get(column, SQL.identifier('t', column)) for column in columns),
+            SQL.identifier(table),
+            VOLUME,
+            template_id,
+        ))
+        self.env.cr.execute(SQL("ANALYZE %s", SQL.identifier(table)))
+
+    def _assert_index_scan(self, index_name, query):
+        # Default planner settings: on populated, analyzed tables the index
+        # must win on cost, not merely exist.
+        self.env.flush_all()
+        self.env.cr.execute(SQL("EXPLAIN (FORMAT JSON) %s", query))
+        plan = json.dumps(self.env.cr.fetchone()[0])
+        self.assertIn(index_name, plan, f'{index_name} is not used by: {query.code}')
+
+    def test_hot_path_indexes(self):
+        tasks = self._create_workorders(SMALL, lines_per_task=2)
+        diaries = self._create_diaries(tasks, 20, self.book)
+        entries = self._create_entries(self.book, 2)
+        task = tasks[0]
+        # The bulk belongs to another workorder and book, as in a database
+        # holding years of other sites.
+        other_task = self._create_workorders(1, lines_per_task=1)
+        other_book = self._create_books(1)
+        self._populate('construction_diary', diaries[0].id,
+                       task_id=SQL("%s", other_task.id),
+                       book_id=SQL("%s", other_book.id),
+                       date=SQL("CURRENT_DATE - (g %% 3650)"),
+                       sync_key=SQL("NULL"))
+        self._populate('construction_book_entry', entries[0].id,
+                       book_id=SQL("%s", other_book.id),
+                       page_number=SQL("g"))
+        self._populate('construction_book_entry_line', entries[0].line_ids[0].id,
+                       entry_id=SQL("%s", entries[1].id))
+        self._populate('workorder_equipment_line', other_task.equipment_line_ids.id,
+                       state=SQL("CASE WHEN g %% 10 = 0 THEN 'draft' ELSE 'returned' END"),
+                       sync_key=SQL("NULL"))
+        self._populate('construction_diary_worker_line', diaries[0].worker_line_ids[0].id,
+                       diary_id=SQL("%s", diaries[-1].id))
+
+        self._assert_index_scan('construction_diary_task_id_date_index', SQL(
+            "SELECT id FROM construction_diary WHERE task_id = %s ORDER BY date DESC", task.id))
+        self._assert_index_scan('construction_diary_book_id_date_index', SQL(
+            "SELECT id FROM construction_diary WHERE book_id = %s AND date >= %s",
+            self.book.id, diaries[-1].date))
+        self._assert_index_scan('construction_book_entry_book_id_page_number_index', SQL(
+            "SELECT id FROM construction_book_entry WHERE book_id = %s ORDER BY page_number", self.book.id))
+        self._assert_index_scan('workorder_equipment_line_task_id_state_index', SQL(
+            "SELECT id FROM workorder_equipment_line WHERE task_id = %s AND state = 'draft'", task.id))
+        self._assert_index_scan('construction_book_entry_line__entry_id_index', SQL(
+            "SELECT id FROM construction_book_entry_line WHERE entry_id = %s", entries[0].id))
+        self._assert_index_scan('construction_diary_worker_line__diary_id_index', SQL(
+            "SELECT id FROM construction_diary_worker_line WHERE diary_id = %s", diaries[0].id))
+
+    def test_fulltext_index(self):
+        tasks = self._create_workorders(2)
+        diaries = self._create_diaries(tasks, 3)
+        diaries[0].contractor_notes = '<p>Кабел положен до новата шахта B</p>'
+        self._populate('construction_diary', diaries[2].id, sync_key=SQL("NULL"))
+        Diary = self.env['construction.diary']
+        self._assert_index_scan('construction_diary_fulltext_document_gin', SQL(
+            "SELECT id FROM construction_diary WHERE %s @@ %s",
+            Diary._fulltext_vector('construction_diary'), Diary._fulltext_query('шахта'),
+        ))
+
+    def test_geo_grid_index(self):
+        origin, other = self._create_workorders(2)
+        origin.write({'site_latitude': 41.9981, 'site_longitude': 21.4254})
+        other.write({'site_latitude': 41.1172, 'site_longitude': 20.8019})
+        self._populate('project_task', other.id,
+                       site_grid_lat=SQL("4000 + g %% 200"),
+                       site_grid_lon=SQL("2000 + g / 1000"))
+        self._assert_index_scan('project_task_site_grid_index', SQL(
+            "SELECT id FROM project_task t WHERE %s AND site_grid_lat BETWEEN 4190 AND 4210"
+            " AND site_grid_lon BETWEEN 2130 AND 2150",
+            self.env['project.task']._geo_located_sql('t'),
+        ))
+
+    # === timesheets ===
+    def _approved_diaries(self, tasks, count):
+        diaries = self._create_diaries(tasks, count)
+        diaries.write({'state': 'approved'})
+        return diaries
+
+    def test_timesheet_generation_scaling(self):
+        tasks = self._create_workorders(SMALL)
+
+        def run(size):
+            diaries = self._approved_diaries(tasks, size)
+            return lambda: diaries._generate_timesheets()
+
+        self.assertQueriesIndependentOfSize(run)
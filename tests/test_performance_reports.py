@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import tagged
+
+from .common import SMALL, WorkorderPerformanceCommon
+
+
+@tagged('post_install', '-at_install')
+class TestPerformanceReports(WorkorderPerformanceCommon):
+
+    def _render(self, report_ref, records):
+        return self.env['ir.actions.report']._render_qweb_html(report_ref, records.ids)[0]
+
+    def test_book_report_scaling(self):
+        tasks = self._create_workorders(SMALL)
+
+        def run(size):
+            books = self._create_books(size)
+            for book in books:
+                self._create_diaries(tasks, 2, book)
+            return lambda: self._render('eskon_workorder.report_construction_book', books)
+
+        self.assertQueriesIndependentOfSize(run)
+
+    def test_book_entry_report_scaling(self):
+        def run(size):
+            entries = self._create_entries(self.book, size, lines_per_entry=40)
+            return lambda: self._render('eskon_workorder.report_construction_book_entry', entries)
+
+        self.assertQueriesIndependentOfSize(run)
+
+    def test_book_entry_report_pages(self):
+        entry = self._create_entries(self.book, 1, lines_per_entry=40)
+        values = self.env['report.eskon_workorder.report_construction_book_entry']._get_report_values(entry.ids)
+        pages = values['pages'][entry.id]
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(len(pages[0]['lines']), 29)
+        self.assertEqual(pages[1]['carried'], 29 * 1.5)
+        self.assertEqual(pages[1]['total'], 40 * 1.5)
+
+    def test_diary_report_scaling(self):
+        tasks = self._create_workorders(SMALL)
+
+        def run(size):
+            diaries = self._create_diaries(tasks, size, self.book)
+            return lambda: self._render('eskon_workorder.report_construction_diary', diaries)
+
+        self.assertQueriesIndependentOfSize(run)
+
+    def test_diary_report_bulk(self):
+        tasks = self._create_workorders(SMALL)
+
+        def run(size):
+            diaries = self._create_diaries(tasks, size, self.book)
+            return lambda: self._render('eskon_workorder.report_construction_diary', diaries)
+
+        with self.assertTimeBudget(120):
+            html = self.assertBulkQueries(run, 1000)
+        self.assertIn('Багер', html.decode())
+
+    def test_vehicle_utilization_bulk(self):
+        tasks = self._create_workorders(SMALL)
+        self._create_diaries(tasks, 2000)
+        self.env.flush_all()
+        with self.assertTimeBudget(10):
+            day_count, used_days, idle_days = self.env['fleet.vehicle.utilization.report']._read_group(
+                [('vehicle_id', '=', self.vehicle.id)], [],
+                ['day_count:sum', 'used_days:sum', 'idle_days:sum'],
+            )[0]
+        self.assertEqual(used_days, 365)
+        self.assertEqual(day_count, used_days + idle_days)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import tagged
+
+from .common import LARGE, WorkorderPerformanceCommon
+
+
+@tagged('post_install', '-at_install')
+class TestPerformanceStock(WorkorderPerformanceCommon):
+
+    def test_stock_request_scaling(self):
+        def run(size):
+            tasks = self._create_workorders(size, lines_per_task=5)
+            return lambda: tasks.action_create_stock_request_batch()
+
+        self.assertQueriesIndependentOfSize(run)
+
+    def test_stock_request_single(self):
+        task = self._create_workorders(1, lines_per_task=20)
+        with self.assertTimeBudget(10):
+            action = task.action_create_stock_request()
+        picking = self.env['stock.picking'].browse(action['res_id'])
+        self.assertEqual(len(picking.move_ids), 20)
+        self.assertEqual(set(task.equipment_line_ids.mapped('state')), {'issued'})
+        self.assertEqual(task.equipment_line_ids.picking_id, picking)
+
+    def test_return_equipment_scaling(self):
+        def run(size):
+            tasks = self._create_workorders(size, lines_per_task=5, line_state='issued')
+            return lambda: tasks.action_return_equipment_batch()
+
+        self.assertQueriesIndependentOfSize(run)
+
+    def test_return_equipment_bulk(self):
+        def run(size):
+            tasks = self._create_workorders(size, lines_per_task=10, line_state='issued')
+
+            def return_all():
+                tasks.action_return_equipment_batch()
+                return tasks
+            return return_all
+
+        with self.assertTimeBudget(60):
+            tasks = self.assertBulkQueries(run, LARGE)
+        lines = tasks.equipment_line_ids
+        self.assertEqual(len(lines), 500)
+        self.assertEqual(set(lines.mapped('state')), {'returned'})
+        self.assertEqual(set(lines.mapped('qty_remaining')), {0.0})
+        self.assertTrue(all(tasks.mapped('equipment_all_returned')))
+
+    def test_return_equipment_single(self):
+        task = self._create_workorders(1, lines_per_task=10, line_state='issued')
+        with self.assertTimeBudget(10):
+            action = task.action_return_equipment()
+        picking = self.env['stock.picking'].browse(action['res_id'])
+        self.assertEqual(picking.picking_type_id.code, 'incoming')
+        self.assertEqual(sum(picking.move_ids.mapped('product_uom_qty')), 40.0)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import Command
+from odoo.tests import tagged
+
+from .common import WorkorderCommon
+
+
+@tagged('post_install', '-at_install')
+class TestWorkorderConflict(WorkorderCommon):
+
+    def test_double_booking(self):
+        task, other, closed, later = self._create_workorders(4)
+        worker, helper = self.employees[:2]
+        task.worker_ids = [Command.set(worker.ids)]
+        other.write({
+            'worker_ids': [Command.set((worker | helper).ids)],
+            'primary_vehicle_id': False,
+            'workorder_state': 'planned',
+            'planned_start': self.planned_start + timedelta(hours=2),
+            'planned_end': self.planned_end + timedelta(hours=4),
+        })
+        closed.workorder_state = 'completed'
+        later.write({
+            'planned_start': self.planned_start + timedelta(days=1),
+            'planned_end': self.planned_end + timedelta(days=1),
+        })
+
+        conflicts = self.env['workorder.conflict']._find_conflicts(task_ids=task.ids)
+        self.assertEqual(conflicts, [{
+            'resource_type': 'employee',
+            'employee_id': worker.id,
+            'vehicle_id': None,
+            'task_id': task.id,
+            'other_task_id': other.id,
+            'conflict_start': self.planned_start + timedelta(hours=2),
+            'conflict_end': self.planned_end,
+        }])
+        self.assertFalse(self.env['workorder.conflict']._find_conflicts(
+            self.planned_start + timedelta(days=2), self.planned_end + timedelta(days=2)))
+
+        # The view lists the pair from both sides
+        rows = self.env['workorder.conflict'].search([('employee_id', '=', worker.id)])
+        self.assertEqual(
+            sorted((row.task_id.id, row.other_task_id.id) for row in rows),
+            sorted([(task.id, other.id), (other.id, task.id)]),
+        )
+        self.assertFalse(self.env['workorder.conflict'].search([('task_id', 'in', (closed | later).ids)]))
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import tagged
+
+from .common import WorkorderCommon
+
+
+@tagged('post_install', '-at_install')
+class TestWorkorderEquipmentCustody(WorkorderCommon):
+
+    def test_custody_return_uses_issue_holder(self):
+        task = self._create_workorders(1)
+        leader, new_leader = self.employees[:2]
+        task.team_leader_id = leader
+        line = self.env['workorder.equipment.line'].create({
+            'task_id': task.id,
+            'product_id': self.products[0].id,
+            'qty_issued': 4.0,
+            'state': 'issued',
+        })
+        self.assertEqual(line.custody_employee_id, leader)
+
+        task.team_leader_id = new_leader
+        line.write({'qty_returned': 4.0, 'state': 'returned'})
+        balances = self.env['workorder.equipment.custody.balance'].search([
+            ('employee_id', 'in', (leader | new_leader).ids),
+            ('product_id', '=', self.products[0].id),
+        ])
+        self.assertFalse(balances.filtered('quantity'), 'the return must clear the issue holder only')
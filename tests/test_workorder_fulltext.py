@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import tagged
+
+from .common import WorkorderCommon
+
+
+@tagged('post_install', '-at_install')
+class TestWorkorderFulltext(WorkorderCommon):
+
+    def test_fulltext_search(self):
+        tasks = self._create_workorders(2)
+        diaries = self._create_diaries(tasks, 3)
+        # diaries[0] is the most recent, so it comes first by date; the
+        # adjacent, repeated terms of diaries[1] must rank it above.
+        diaries[0].contractor_notes = '<p>Кабел положен по целата траса до новата <b>шахта B</b></p>'
+        diaries[1].contractor_notes = '<p>Кабел шахта B, кабел шахта C</p>'
+        Diary = self.env['construction.diary']
+        domain = [('fulltext', 'ilike', 'шахта кабел')]
+
+        found = Diary.search(domain)
+        self.assertEqual(found.ids, [diaries[1].id, diaries[0].id], 'the denser match ranks first')
+        self.assertEqual(Diary.search(domain, order='date desc, id desc').ids, found.ids)
+        self.assertEqual(Diary.search_count(domain), 2)
+        self.assertEqual(Diary.search([('id', 'in', diaries.ids)]).ids, diaries.ids)
+        self.assertNotIn('<b>', diaries[0].fulltext_document)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import tagged
+
+from odoo.addons.eskon_workorder.models.workorder_geo import parse_map_link
+
+from .common import WorkorderCommon
+
+
+@tagged('post_install', '-at_install')
+class TestWorkorderGeo(WorkorderCommon):
+
+    def test_map_link_parsing(self):
+        self.assertEqual(parse_map_link(
+            'https://www.google.com/maps/place/Skopje/@41.99,21.42,14z/data=!3m1!4b1!3d41.9981!4d21.4254'),
+            (41.9981, 21.4254))
+        self.assertEqual(parse_map_link('https://www.openstreetmap.org/#map=17/41.99646/21.43141'),
+                         (41.99646, 21.43141))
+        self.assertEqual(parse_map_link('geo:41.1172,20.8019'), (41.1172, 20.8019))
+        self.assertEqual(parse_map_link('41.0297, 21.3292'), (41.0297, 21.3292))
+        self.assertIsNone(parse_map_link('ул. Партизанска 12, Скопје'))
+
+    def test_nearby_workorders(self):
+        origin, near, far, done = self._create_workorders(4)
+        origin.site_map_link = 'https://maps.google.com/?q=41.9981,21.4254'
+        near.write({'site_latitude': 42.0050, 'site_longitude': 21.4100})
+        far.write({'site_latitude': 41.1172, 'site_longitude': 20.8019})
+        done.write({'site_latitude': 41.9990, 'site_longitude': 21.4260, 'workorder_state': 'completed'})
+        self.assertEqual((origin.site_grid_lat, origin.site_grid_lon), (4199, 2142))
+
+        Task = self.env['project.task']
+        action = origin.action_view_nearby_workorders()
+        tasks = Task.with_context(action['context']).search(action['domain'])
+        self.assertEqual(tasks.ids, [near.id, far.id])
+        self.assertLess(tasks[0].site_distance_km, 2.0)
+        self.assertEqual(Task.search(action['domain'], order='id desc').ids, [near.id, far.id])
+        self.assertEqual(Task.search_count(action['domain']), 2)
+
+        within = Task._geo_search_radius(41.9981, 21.4254, 5.0)
+        self.assertEqual([task for task, _distance in within], [origin, done, near])
+        # The closed workorder next to the origin must not take the only slot
+        nearest = Task._geo_nearest(41.9981, 21.4254, limit=1, domain=[
+            ('workorder_state', '!=', 'completed'), ('id', '!=', origin.id)])
+        self.assertEqual([task for task, _distance in nearest], [near])
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import WorkorderCommon
+
+
+@tagged('post_install', '-at_install')
+class TestWorkorderKpi(WorkorderCommon):
+
+    def _kpi(self, task):
+        self.env.invalidate_all()
+        return self.env['workorder.kpi'].search([('task_id', '=', task.id)])
+
+    def test_kpi_values(self):
+        task = self._create_workorders(1, lines_per_task=2, line_state='issued')
+        task.equipment_line_ids[0].qty_returned = 2.0
+        task.actual_start = fields.Datetime.now() - timedelta(days=2)
+        diaries = self._create_diaries(task, 2)
+
+        kpi = self._kpi(task)
+        self.assertRecordValues(kpi, [{
+            'workorder_state': 'in_progress',
+            'planned_hours': 9.0,
+            'total_workers': 5,
+            'qty_issued': 8.0,
+            'qty_returned': 2.0,
+            'return_ratio': 0.25,
+            'diary_count': 2,
+            'diary_days': 2,
+            'work_days': 3,
+            'is_late': False,
+        }])
+        self.assertAlmostEqual(kpi.diary_coverage, 2 / 3)
+
+        # Open workorders age without writes; the nightly job catches up
+        self.env.cr.execute("UPDATE workorder_kpi SET work_days = 1 WHERE task_id = %s", [task.id])
+        self.env['workorder.kpi']._cron_refresh_open()
+        self.assertEqual(self._kpi(task).work_days, 3)
+
+        diaries[1].unlink()
+        task.write({'workorder_state': 'completed', 'actual_end': self.planned_end + timedelta(hours=2)})
+        self.assertRecordValues(self._kpi(task), [{
+            'workorder_state': 'completed',
+            'diary_count': 1,
+            'delay_hours': 2.0,
+            'is_late': True,
+        }])
+
+        task.is_workorder = False
+        self.assertFalse(self._kpi(task))
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import tagged
+
+from odoo.addons.eskon_workorder.models.workorder_profile import PROFILE_RETENTION_DAYS
+
+from .common import WorkorderCommon
+
+
+@tagged('post_install', '-at_install')
+class TestWorkorderProfile(WorkorderCommon):
+
+    def _logs(self, key):
+        return self.env['workorder.profile.log'].search([('name', '=', key)])
+
+    def test_profiled_action(self):
+        key = 'construction.diary.action_confirm'
+        diaries = self._create_diaries(self._create_workorders(1), 2)
+        ICP = self.env['ir.config_parameter'].sudo()
+
+        ICP.set_param('eskon_workorder.profile_sample_rate', 0)
+        diaries[0].action_confirm()
+        self.assertFalse(self._logs(key), 'unsampled calls are not logged')
+
+        ICP.set_param('eskon_workorder.profile_sample_rate', 1)
+        self.assertTrue(diaries[1].action_confirm())
+        self.assertEqual(diaries[1].state, 'confirmed')
+        self.assertRecordValues(self._logs(key), [{
+            'res_model': 'construction.diary',
+            'record_count': 1,
+            'user_id': self.env.uid,
+        }])
+        log = self._logs(key)
+        self.assertGreater(log.query_count, 0)
+        self.assertGreaterEqual(log.rows_written, 1)
+        self.assertGreaterEqual(log.duration_ms, 0.0)
+
+    def test_log_vacuum(self):
+        Log = self.env['workorder.profile.log']
+        now = fields.Datetime.now()
+        old, recent = Log.create([
+            {'name': 'test.action', 'date': now - timedelta(days=PROFILE_RETENTION_DAYS + 1)},
+            {'name': 'test.action', 'date': now - timedelta(days=PROFILE_RETENTION_DAYS - 1)},
+        ])
+        Log._gc_profile_logs()
+        self.assertFalse(old.exists())
+        self.assertTrue(recent.exists())
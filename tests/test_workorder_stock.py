@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import tagged
+
+from .common import WorkorderCommon
+
+
+@tagged('post_install', '-at_install')
+class TestWorkorderStock(WorkorderCommon):
+
+    def test_stock_request_per_warehouse(self):
+        warehouse = self.env['stock.warehouse'].create({'name': 'Магацин Штип', 'code': 'WHS'})
+        task_main, task_other = self._create_workorders(2, lines_per_task=3)
+        task_other.warehouse_id = warehouse
+        (task_main | task_other).action_create_stock_request_batch()
+        self.assertEqual(task_other.equipment_line_ids.picking_id.picking_type_id, warehouse.out_type_id)
+        self.assertNotEqual(task_main.equipment_line_ids.picking_id.picking_type_id.warehouse_id, warehouse)
+
+        # Equipment goes back where it came from, even after a warehouse change
+        task_other.warehouse_id = False
+        task_other.action_return_equipment()
+        returns = self.env['stock.picking'].search([('origin', 'ilike', task_other.name), ('picking_type_code', '=', 'incoming')])
+        self.assertEqual(returns.picking_type_id, warehouse.in_type_id)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import tagged
+from odoo.tools import SQL
+
+from .common import WorkorderCommon
+
+
+@tagged('post_install', '-at_install')
+class TestWorkorderSync(WorkorderCommon):
+
+    def test_sync_pages(self):
+        tasks = self._create_workorders(2, lines_per_task=2)
+        diaries = self._create_diaries(tasks, 3)
+        # Move the rows out of the window held back for running transactions
+        self.env.flush_all()
+        for table in ('construction_diary', 'construction_diary_worker_line', 'construction_diary_vehicle_line',
+                      'construction_diary_machine_line', 'workorder_equipment_line'):
+            self.env.cr.execute(SQL(
+                "UPDATE %s SET write_date = write_date - INTERVAL '1 hour'", SQL.identifier(table)))
+        self.env.invalidate_all()
+        self.env['ir.config_parameter'].sudo().set_param('eskon_workorder.sync_page_size', 2)
+
+        Sync = self.env['workorder.sync']
+        seen_diaries, seen_lines, cursor = [], [], None
+        for _call in range(5):
+            result = Sync._sync(cursor=cursor)
+            seen_diaries += [diary['id'] for diary in result['changes']['diaries']]
+            seen_lines += [line['id'] for line in result['changes']['equipment_lines']]
+            cursor = result['cursor']
+            if not result['more']:
+                break
+        self.assertFalse(result['more'])
+        self.assertEqual(sorted(seen_diaries), sorted(diaries.ids))
+        self.assertEqual(sorted(seen_lines), sorted(tasks.equipment_line_ids.ids))
+
+        result = Sync._sync(cursor=cursor)
+        self.assertFalse(result['changes']['diaries'] or result['changes']['equipment_lines'])
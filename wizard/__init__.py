@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+from . import construction_book_period_close
+from . import construction_book_entry_line_import
+from . import construction_diary_timesheet_generate
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+import base64
+import csv
+import io
+
+import openpyxl
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import split_every
+
+# Rows resolved and created per batch
+IMPORT_BATCH_SIZE = 1000
+
+# Accepted column headers (lower case) per entry line field
+IMPORT_COLUMNS = {
+    'location': ('location', 'локација'),
+    'description': ('description', 'изведена позиција', 'опис'),
+    'uom': ('uom', 'единица мерка', 'ем'),
+    'quantity': ('quantity', 'количина'),
+    'product': ('product', 'производ', 'шифра'),
+    'details': ('details', 'детали'),
+    'notes': ('notes', 'забелешки'),
+}
+
+
+class ConstructionBookEntryLineImport(models.TransientModel):
+    _name = 'construction.book.entry.line.import'
+    _description = 'Construction Book Entry Line Import'
+
+    def _default_entry_id(self):
+        if self.env.context.get('active_model') == 'construction.book.entry':
+            return self.env.context.get('active_id')
+        return False
+
+    entry_id = fields.Many2one(
+        'construction.book.entry',
+        string='Страница',
+        required=True,
+        default=_default_entry_id
+    )
+
+    file = fields.Binary(
+        string='Датотека',
+        required=True,
+        help='CSV (UTF-8) или XLSX со заглавие во првиот ред'
+    )
+
+    filename = fields.Char(string='Име на датотека')
+
+    error_report = fields.Text(
+        string='Грешки',
+        readonly=True
+    )
+
+    @api.onchange('file')
+    def _onchange_file(self):
+        self.error_report = False
+
+    def action_import(self):
+        """Validate every row of the file, then create the lines in batches"""
+        self.ensure_one()
+        if self.entry_id.state != 'draft':
+            raise ValidationError(_('Позиции може да се увезат само во страница во нацрт!'))
+
+        vals_list, errors = self._parse_lines()
+        if errors:
+            self.error_report = '\n'.join(errors)
+            return {
+                'type': 'ir.actions.act_window',
+                'res_model': self._name,
+                'res_id': self.id,
+                'view_mode': 'form',
+                'target': 'new',
+            }
+
+        Line = self.env['construction.book.entry.line']
+        last_sequence = max(self.entry_id.line_ids.mapped('sequence'), default=0)
+        for index, vals in enumerate(vals_list, start=1):
+            vals.update(entry_id=self.entry_id.id, sequence=last_sequence + index * 10)
+        for batch in split_every(IMPORT_BATCH_SIZE, vals_list, list):
+            Line.create(batch)
+        return {'type': 'ir.actions.act_window_close'}
+
+    def _parse_lines(self):
+        """Return the line values of all valid rows and the errors of the rest"""
+        vals_list, errors = [], []
+        for batch in split_every(IMPORT_BATCH_SIZE, self._iter_rows(), list):
+            products, product_errors = self._resolve_products({
+                row['product'] for _row_number, row in batch if row.get('product')
+            })
+            for row_number, row in batch:
+                row_errors = []
+                vals = {
+                    fname: row[fname]
+                    for fname in ('location', 'description', 'uom', 'details', 'notes')
+                    if row.get(fname)
+                }
+                reference = row.get('product')
+                if reference:
+                    if reference in product_errors:
+                        row_errors.append(product_errors[reference])
+                    else:
+                        product = products[reference]
+                        vals['product_id'] = product.id
+                        vals.setdefault('description', product.name)
+                        if product.uom_id:
+                            vals.setdefault('uom', product.uom_id.name)
+                if not vals.get('description'):
+                    row_errors.append(_('недостасува опис или производ'))
+                try:
+                    vals['quantity'] = self._parse_quantity(row.get('quantity'))
+                except ValueError:
+                    row_errors.append(_('неважечка количина „%s“', row.get('quantity')))
+                if row_errors:
+                    errors.append(_('Ред %(row)s: %(errors)s', row=row_number, errors='; '.join(row_errors)))
+                else:
+                    vals_list.append(vals)
+        if not vals_list and not errors:
+            errors.append(_('Датотеката нема ниту една позиција.'))
+        return vals_list, errors
+
+    def _iter_rows(self):
+        """Yield ``(row number, {field: text})`` for each non-empty data row"""
+        rows = self._iter_file_rows()
+        header = next(rows, None)
+        if not header:
+            raise UserError(_('Датотеката е празна.'))
+        labels = [str(cell or '').strip().lower() for cell in header]
+        columns = {}
+        for fname, aliases in IMPORT_COLUMNS.items():
+            for index, label in enumerate(labels):
+                if label in aliases:
+                    columns[fname] = index
+                    break
+        if 'quantity' not in columns or not ({'description', 'product'} & set(columns)):
+            raise UserError(_('Потребни се колони „Количина“ и „Изведена позиција“ или „Производ“.'))
+
+        for row_number, cells in enumerate(rows, start=2):
+            row = {}
+            for fname, index in columns.items():
+                value = cells[index] if index < len(cells) else None
+                if isinstance(value, float) and value.is_integer() and fname != 'quantity':
+                    value = int(value)
+                if value is not None and fname != 'quantity':
+                    value = str(value).strip()
+                row[fname] = value
+            if any(value not in (None, '') for value in row.values()):
+                yield row_number, row
+
+    def _iter_file_rows(self):
+        """Yield the raw rows of the uploaded CSV or XLSX file"""
+        data = io.BytesIO(base64.b64decode(self.file))
+        if (self.filename or '').lower().endswith('.xlsx'):
+            workbook = openpyxl.load_workbook(data, read_only=True, data_only=True)
+            try:
+                yield from workbook.active.iter_rows(values_only=True)
+            finally:
+                workbook.close()
+        else:
+            text = io.TextIOWrapper(data, encoding='utf-8-sig', newline='')
+            sample = text.read(4096)
+            text.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+            except csv.Error:
+                dialect = csv.excel
+            yield from csv.reader(text, dialect)
+
+    @api.model
+    def _parse_quantity(self, value):
+        if isinstance(value, (int, float)):
+            return float(value)
+        return float(str(value or '').replace(' ', '').replace(',', '.'))
+
+    @api.model
+    def _resolve_products(self, references):
+        """Match product references by internal reference, then by name.
+
+        Returns ``({reference: product}, {reference: error})`` using a single
+        product query for the whole batch.
+        """
+        if not references:
+            return {}, {}
+        references = list(references)
+        candidates = self.env['product.product'].search_fetch(
+            ['|', ('default_code', 'in', references), ('name', 'in', references)],
+            ['default_code', 'name', 'uom_id'],
+        )
+        by_code, by_name = {}, {}
+        for product in candidates:
+            if product.default_code:
+                by_code.setdefault(product.default_code, product)
+            by_name.setdefault(product.name, self.env['product.product'])
+            by_name[product.name] |= product
+
+        products, errors = {}, {}
+        for reference in references:
+            if reference in by_code:
+                products[reference] = by_code[reference]
+            elif len(by_name.get(reference, ())) == 1:
+                products[reference] = by_name[reference]
+            elif reference in by_name:
+                errors[reference] = _('производот „%s“ не е еднозначен', reference)
+            else:
+                errors[reference] = _('непознат производ „%s“', reference)
+        return products, errors
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+import bisect
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models, _
+from odoo.exceptions import ValidationError
+from odoo.tools import split_every
+
+from ..report.construction_book_entry_report import ROWS_PER_PAGE
+
+
+class ConstructionBookPeriodClose(models.TransientModel):
+    _name = 'construction.book.period.close'
+    _description = 'Construction Book Period Close'
+
+    def _default_book_ids(self):
+        if self.env.context.get('active_model') == 'construction.book':
+            return self.env.context.get('active_ids', [])
+        return []
+
+    def _default_period_start(self):
+        return fields.Date.context_today(self).replace(day=1) - relativedelta(months=1)
+
+    def _default_period_end(self):
+        return fields.Date.context_today(self).replace(day=1) - timedelta(days=1)
+
+    book_ids = fields.Many2many(
+        'construction.book',
+        string='Градежни книги',
+        required=True,
+        default=_default_book_ids
+    )
+
+    period_start = fields.Date(
+        string='Почеток на период',
+        required=True,
+        default=_default_period_start
+    )
+
+    period_end = fields.Date(
+        string='Крај на период',
+        required=True,
+        default=_default_period_end
+    )
+
+    @api.constrains('period_start', 'period_end')
+    def _check_period_dates(self):
+        for wizard in self:
+            if wizard.period_end < wizard.period_start:
+                raise ValidationError(_('Крајот на периодот не може да биде пред почетокот!'))
+
+    def action_close_period(self):
+        """Create the book entries of the period from approved diaries"""
+        self.ensure_one()
+        entries = self._create_entries()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Страници'),
+            'res_model': 'construction.book.entry',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', entries.ids)],
+        }
+
+    def _create_entries(self):
+        """Build the period's entries and lines for all books in one pass.
+
+        Work positions are the materials consumed on the workorders of the
+        approved diaries (from the custody ledger) and the diary work hours
+        per workorder. They are split into pages of ``ROWS_PER_PAGE`` rows
+        with consecutive page numbers after the last page of each book.
+        """
+        Entry = self.env['construction.book.entry']
+        books = self.book_ids
+
+        existing = Entry.search([
+            ('book_id', 'in', books.ids),
+            ('period_start', '<=', self.period_end),
+            ('period_end', '>=', self.period_start),
+        ])
+        if existing:
+            raise ValidationError(_(
+                'Периодот се преклопува со веќе затворен период за: %s',
+                ', '.join(existing.book_id.mapped('name'))))
+
+        positions = self._get_positions(books)
+        last_pages = dict(Entry._read_group(
+            [('book_id', 'in', books.ids)], ['book_id'], ['page_number:max']))
+
+        entry_vals_list = []
+        entry_lines = []
+        for book in books:
+            page_number = last_pages.get(book, 0)
+            for page_positions in split_every(ROWS_PER_PAGE, positions[book.id], list):
+                page_number += 1
+                entry_vals_list.append({
+                    'book_id': book.id,
+                    'page_number': page_number,
+                    'period_start': self.period_start,
+                    'period_end': self.period_end,
+                    'main_contractor': book.contractor_company,
+                    'supervision': book.supervision_company,
+                    'site_name': book.construction_name,
+                    'site_address': book.construction_address,
+                })
+                entry_lines.append(page_positions)
+        entries = Entry.create(entry_vals_list)
+
+        line_vals_list = []
+        for entry, page_positions in zip(entries, entry_lines):
+            for index, position in enumerate(page_positions):
+                line_vals_list.append(dict(position, entry_id=entry.id, sequence=(index + 1) * 10))
+        self.env['construction.book.entry.line'].create(line_vals_list)
+        return entries
+
+    def _get_positions(self, books):
+        """Return ``{book_id: [line values]}`` aggregated for the period"""
+        Diary = self.env['construction.diary']
+        period_domain = [
+            ('state', '=', 'approved'),
+            ('date', '>=', self.period_start),
+            ('date', '<=', self.period_end),
+        ]
+        diary_groups = Diary._read_group(
+            [('book_id', 'in', books.ids)] + period_domain, ['book_id', 'task_id'], ['total_work_hours:sum'])
+
+        book_tasks = defaultdict(list)
+        for book, task, hours in diary_groups:
+            book_tasks[task].append((book, hours))
+
+        consumed = defaultdict(list)
+        if book_tasks:
+            task_ids = [task.id for task in book_tasks]
+            # Diary days of the tasks in every book, to split their
+            # consumption between the books they are recorded in
+            diary_days = defaultdict(list)
+            for row in Diary.search_read(
+                    [('task_id', 'in', task_ids), ('book_id', '!=', False)] + period_domain,
+                    ['task_id', 'book_id', 'date'], order='date, id', load=None):
+                diary_days[row['task_id']].append((row['date'], row['book_id']))
+
+            book_consumed = defaultdict(lambda: defaultdict(float))
+            date_from = datetime.combine(self.period_start, time.min)
+            date_to = datetime.combine(self.period_end + timedelta(days=1), time.min)
+            for task, product, day, quantity in self.env['workorder.equipment.custody']._read_group([
+                ('event_type', '=', 'consume'),
+                ('task_id', 'in', task_ids),
+                ('date', '>=', date_from),
+                ('date', '<', date_to),
+            ], ['task_id', 'product_id', 'date:day'], ['quantity:sum']):
+                book_id = self._book_of_day(diary_days[task.id], day.date())
+                book_consumed[(book_id, task)][product] += quantity
+            for (book_id, task), quantities in book_consumed.items():
+                consumed[(book_id, task)] = list(quantities.items())
+
+        positions = defaultdict(list)
+        for task in sorted(book_tasks, key=lambda task: task.name or ''):
+            location = task.work_location or task.name
+            for book, hours in book_tasks[task]:
+                for product, quantity in sorted(consumed[(book.id, task)], key=lambda item: item[0].display_name):
+                    positions[book.id].append({
+                        'location': location,
+                        'description': product.display_name,
+                        'product_id': product.id,
+                        'uom': product.uom_id.name,
+                        'quantity': quantity,
+                    })
+                if hours:
+                    positions[book.id].append({
+                        'location': location,
+                        'description': _('Работа на терен: %s', task.name),
+                        'uom': 'ч',
+                        'quantity': hours,
+                    })
+        return positions
+
+    @api.model
+    def _book_of_day(self, diary_days, day):
+        """Return the book of the latest diary on or before ``day``.
+
+        ``diary_days`` are the ``(date, book_id)`` of a task's diaries in
+        date order; consumption before its first diary goes to that diary's
+        book.
+        """
+        index = bisect.bisect_right([diary_date for diary_date, _book_id in diary_days], day)
+        return diary_days[max(index - 1, 0)][1]
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models, _
+from odoo.exceptions import ValidationError
+
+
+class ConstructionDiaryTimesheetGenerate(models.TransientModel):
+    _name = 'construction.diary.timesheet.generate'
+    _description = 'Construction Diary Timesheet Generation'
+
+    def _default_date_from(self):
+        return fields.Date.context_today(self).replace(day=1) - relativedelta(months=1)
+
+    def _default_date_to(self):
+        return fields.Date.context_today(self).replace(day=1) - timedelta(days=1)
+
+    date_from = fields.Date(
+        string='Од датум',
+        required=True,
+        default=_default_date_from
+    )
+
+    date_to = fields.Date(
+        string='До датум',
+        required=True,
+        default=_default_date_to
+    )
+
+    project_ids = fields.Many2many(
+        'project.project',
+        string='Проекти',
+        domain=[('allow_timesheets', '=', True)],
+        help='Оставете празно за сите проекти'
+    )
+
+    @api.constrains('date_from', 'date_to')
+    def _check_dates(self):
+        for wizard in self:
+            if wizard.date_to < wizard.date_from:
+                raise ValidationError(_('Крајниот датум не може да биде пред почетниот!'))
+
+    def action_generate(self):
+        """Create the missing timesheets of the period and list all of them"""
+        self.ensure_one()
+        diaries = self._get_diaries()
+        diaries._generate_timesheets()
+        action = self.env['ir.actions.act_window']._for_xml_id('hr_timesheet.timesheet_action_all')
+        action.update({
+            'name': _('Евиденција на часови од дневник'),
+            'domain': [('diary_id', 'in', diaries.ids)],
+            'context': {'create': False},
+        })
+        return action
+
+    def _get_diaries(self):
+        domain = self.env['construction.diary']._timesheet_domain() + [
+            ('date', '>=', self.date_from),
+            ('date', '<=', self.date_to),
+        ]
+        if self.project_ids:
+            domain.append(('project_id', 'in', self.project_ids.ids))
+        return self.env['construction.diary'].search(domain, order='date, id')